@@ -0,0 +1,660 @@
+"""Benchmarks for dashboard hot paths.
+
+Run from the repo root:
+
+    python benchmark.py grid
+    python benchmark.py startup
+    python benchmark.py fragments
+    python benchmark.py pages [--sizes 100 10000 100000] [--output results.json]
+    python benchmark.py writes [--latency 0.2] [--n8n-latency 1.0]
+    python benchmark.py shards [--rows 100000] [--shards 4]
+
+The pages suite drives every dashboard page with AppTest against fake sheets
+and a local n8n stub, and writes its results as JSON for tracking over time.
+"""
+import argparse
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ========================================
+# SYNTHETIC DATA
+# ========================================
+
+def make_leads(n):
+    """Deterministic CORA leads frame with n rows"""
+    return pd.DataFrame({
+        "Lead ID": [f"L{i:06d}" for i in range(n)],
+        "Name": [f"Lead {i}" for i in range(n)],
+        "Organization": [("City of " if i % 2 else "Church of ") + f"Place {i % 97}" for i in range(n)],
+        "Email": [f"lead{i}@example.org" for i in range(n)],
+        "Status": [("New", "Qualified", "Contacted")[i % 3] for i in range(n)],
+        "timestamp": [f"2026-10-{i % 28 + 1:02d} 09:{i % 60:02d}:00" for i in range(n)],
+    })
+
+
+def make_tasks(n):
+    """Deterministic OPSI tasks frame with n rows"""
+    return pd.DataFrame({
+        "Task ID": [f"OPSI-{i:06d}" for i in range(n)],
+        "Task Title": [f"Task {i}" for i in range(n)],
+        "Task Type": [("RFP Submission", "Compliance Review", "Follow-up")[i % 3] for i in range(n)],
+        "Assigned To": [("Sam", "Alex", "Jordan", "Riley")[i % 4] for i in range(n)],
+        "Deadline Date": [f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d}" for i in range(n)],
+        "Status": [("New", "In Progress", "Completed")[i % 3] for i in range(n)],
+        "Priority": [("High", "Medium", "Low")[i % 3] for i in range(n)],
+        "Notes": ["" for _ in range(n)],
+    })
+
+
+def sheet_values(frame):
+    """A frame as the raw string grid get_all_values returns"""
+    return [list(frame.columns)] + frame.astype(str).values.tolist()
+
+
+class FakeWorksheet:
+    """In-memory worksheet: the reads the sync layer makes and the writes the sheets backend makes.
+
+    Every call waits ``latency`` seconds, like one Sheets API round-trip.
+    """
+
+    def __init__(self, values, latency=0.0):
+        self.values = values
+        self.latency = latency
+        self.calls = 0
+
+    def get_all_values(self):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [list(row) for row in self.values]
+
+    def batch_get(self, ranges):
+        self.calls += 1
+        time.sleep(self.latency)
+        out = []
+        for a1 in ranges:
+            if a1 == "1:1":
+                out.append([list(self.values[0])])
+            else:
+                start = int(re.match(r"A(\d+):", a1).group(1))
+                out.append([list(row) for row in self.values[start - 1:]])
+        return out
+
+    def row_values(self, row):
+        self.calls += 1
+        time.sleep(self.latency)
+        return list(self.values[row - 1]) if row <= len(self.values) else []
+
+    def col_values(self, col):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [row[col - 1] if col <= len(row) else "" for row in self.values]
+
+    def append_rows(self, rows, value_input_option=None):
+        self.calls += 1
+        time.sleep(self.latency)
+        self.values.extend([str(cell) for cell in row] for row in rows)
+
+    def batch_update(self, data, value_input_option=None):
+        """Single-cell A1 ranges only, which is all the sheets backend writes"""
+        self.calls += 1
+        time.sleep(self.latency)
+        for update in data:
+            letters, row = re.fullmatch(r"([A-Z]+)(\d+)", update["range"]).groups()
+            col = 0
+            for letter in letters:
+                col = col * 26 + ord(letter) - ord("A") + 1
+            cells = self.values[int(row) - 1]
+            cells.extend([""] * (col - len(cells)))
+            cells[col - 1] = str(update["values"][0][0])
+
+
+class FakeSheetsClient:
+    """Stand-in for a gspread client: ``open_by_key(key).sheet1`` serves a fake worksheet"""
+
+    def __init__(self, worksheets):
+        self.worksheets = worksheets
+
+    def open_by_key(self, key):
+        return type("Spreadsheet", (), {"sheet1": self.worksheets[key]})()
+
+
+def install_fake_sheets(leads, tasks, latency=0.0):
+    """Route the dashboard's sheet reads to in-memory sheets; returns the AppTest secrets to set"""
+    import utils
+    # Keyed by size so a new data set gets a fresh sheet sync
+    cora_key, opsi_key = f"bench-cora-{len(leads)}", f"bench-opsi-{len(tasks)}"
+    from sheets_client import QuotaSheetsClient
+    # Same wrapper as production, with a quota high enough not to skew timings
+    client = QuotaSheetsClient(FakeSheetsClient({
+        cora_key: FakeWorksheet(sheet_values(leads), latency),
+        opsi_key: FakeWorksheet(sheet_values(tasks), latency),
+    }), reads_per_minute=60_000, writes_per_minute=60_000)
+    utils.connect_to_sheets = lambda: client
+    return {"CORA_SHEET_ID": cora_key, "OPSI_SHEET_ID": opsi_key}
+
+
+def isolate_caches():
+    """Point snapshots and the outbox at a throwaway directory (call before importing utils)"""
+    cache = tempfile.mkdtemp(prefix="dashboard-bench-")
+    os.environ["DASHBOARD_SNAPSHOT_DIR"] = os.path.join(cache, "snapshots")
+    os.environ["DASHBOARD_OUTBOX_PATH"] = os.path.join(cache, "outbox.sqlite3")
+    return cache
+
+# ========================================
+# LEAD GRID
+# ========================================
+
+def _grid_app():
+    import streamlit as st
+    from components import lead_selection_grid
+    lead_selection_grid(st.session_state.bench_leads, key="bench")
+
+
+def bench_grid(sizes=(100, 1_000, 10_000, 100_000), reruns=5):
+    """Time the first render and a checkbox-toggle rerun of the lead grid"""
+    results = []
+    for n in sizes:
+        at = AppTest.from_function(_grid_app, default_timeout=120)
+        at.session_state["bench_leads"] = make_leads(n)
+
+        start = time.perf_counter()
+        at.run()
+        first = time.perf_counter() - start
+
+        timings = []
+        for i in range(reruns):
+            start = time.perf_counter()
+            at.checkbox(key=f"bench_check_{i}").check().run()
+            timings.append(time.perf_counter() - start)
+
+        results.append({
+            "rows": n,
+            "first_render_s": round(first, 4),
+            "rerun_s": round(sorted(timings)[len(timings) // 2], 4),
+            "checkboxes": len(at.checkbox),
+            "selected": len(at.session_state["bench_selected"]),
+        })
+    return results
+
+
+# ========================================
+# STARTUP
+# ========================================
+
+# Modules that should only load once a sheet is read or a webhook is sent
+LAZY_MODULES = ["gspread", "google.oauth2", "requests", "urllib3"]
+APP_MODULES = ["utils", "cora", "mark", "opsi", "components", "search"]
+
+
+# Timed before anything else loads, so it includes streamlit and pandas themselves
+_STARTUP_CHILD = (
+    "import time; start = time.perf_counter(); import streamlit, pandas; "
+    "framework_s = time.perf_counter() - start; import benchmark; "
+    "benchmark._startup_child({rows}, {latency}, framework_s)"
+)
+
+
+def _startup_child(rows, latency, framework_s):
+    """Runs in a fresh interpreter: time app imports, then the first render of the overview"""
+    start = time.perf_counter()
+    for name in APP_MODULES:
+        __import__(name)
+    app_import_s = time.perf_counter() - start
+    loaded_early = [name for name in LAZY_MODULES if name in sys.modules]
+
+    secrets = install_fake_sheets(make_leads(rows), make_tasks(rows), latency)
+    at = AppTest.from_file(os.path.join(REPO_DIR, "dashboard.py"), default_timeout=120)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    start = time.perf_counter()
+    at.run()
+    first_render_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    at.run()
+    rerun_s = time.perf_counter() - start
+
+    print(json.dumps({
+        "framework_import_s": round(framework_s, 4),
+        "app_import_s": round(app_import_s, 4),
+        "first_render_s": round(first_render_s, 4),
+        "rerun_s": round(rerun_s, 4),
+        "lazy_modules_loaded_at_import": loaded_early,
+        "exceptions": [e.value for e in at.exception],
+    }))
+
+
+def bench_startup(runs=5, rows=1_000, latency=0.2):
+    """Median import and first-render times over fresh processes with cold caches"""
+    samples = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as cache:
+            env = dict(
+                os.environ,
+                DASHBOARD_SNAPSHOT_DIR=os.path.join(cache, "snapshots"),
+                DASHBOARD_OUTBOX_PATH=os.path.join(cache, "outbox.sqlite3"),
+            )
+            output = subprocess.run(
+                [sys.executable, "-c", _STARTUP_CHILD.format(rows=rows, latency=latency)],
+                cwd=REPO_DIR, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+
+    result = {"runs": runs, "rows": rows, "sheet_latency_s": latency}
+    for key in ("framework_import_s", "app_import_s", "first_render_s", "rerun_s"):
+        result[key] = sorted(sample[key] for sample in samples)[runs // 2]
+    result["lazy_modules_loaded_at_import"] = samples[-1]["lazy_modules_loaded_at_import"]
+    result["exceptions"] = samples[-1]["exceptions"]
+    return result
+
+
+# ========================================
+# FRAGMENTS
+# ========================================
+
+def _panel_app():
+    import streamlit as st
+    import components
+    from utils import load_cora_data
+    panel = st.session_state.bench_panel
+    if panel == "lead_approval_panel":
+        components.lead_approval_panel(load_cora_data())
+    else:
+        getattr(components, panel)()
+
+
+def _element_count(node):
+    children = getattr(node, "children", None) or {}
+    return 1 + sum(_element_count(child) for child in children.values())
+
+
+def _tick_lead(at, i):
+    box = at.checkbox(key="cora_leads_check_0")
+    return box.uncheck() if box.value else box.check()
+
+
+def _search_task_id(at, i):
+    return at.text_input(key="task_id_search_input").input(("OPSI-00001", "OPSI-00002")[i % 2])
+
+
+def _change_status(at, i):
+    select = [s for s in at.selectbox if s.label == "Status:"][0]
+    return select.select(("Completed", "On Hold")[i % 2])
+
+
+def _search_active_tasks(at, i):
+    return at.text_input(key="task_search").input(("Sam", "Alex")[i % 2])
+
+
+# (interaction, page, fragment that owns it, widget action)
+FRAGMENT_INTERACTIONS = [
+    ("tick a lead", "Approve Leads", "lead_approval_panel", _tick_lead),
+    ("type a Task ID", "Manage Tasks", "task_update_panel", _search_task_id),
+    ("change task status", "Manage Tasks", "task_update_panel", _change_status),
+    ("search active tasks", "Manage Tasks", "active_tasks_panel", _search_active_tasks),
+]
+
+
+def _time_interaction(at, action, reruns):
+    timings = []
+    for i in range(reruns):
+        start = time.perf_counter()
+        action(at, i).run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return sorted(timings)[len(timings) // 2]
+
+
+def bench_fragments(rows=10_000, reruns=5):
+    """Compare a whole-script rerun with rerunning only the fragment an interaction lives in.
+
+    AppTest always reruns the full script, so the fragment cost is measured by
+    running the fragment function on its own against the same data.
+    """
+    secrets = install_fake_sheets(make_leads(rows), make_tasks(rows))
+    results = []
+    for name, page, panel, action in FRAGMENT_INTERACTIONS:
+        runs = {}
+        for scope in ("full", "fragment"):
+            if scope == "full":
+                at = AppTest.from_file(os.path.join(REPO_DIR, "dashboard.py"), default_timeout=120)
+                at.session_state["selected_page"] = page
+            else:
+                at = AppTest.from_function(_panel_app, default_timeout=120)
+                at.session_state["bench_panel"] = panel
+            for key, value in secrets.items():
+                at.secrets[key] = value
+            at.run()
+            if panel == "task_update_panel" and action is _change_status:
+                # Pick a task first so the status selectbox exists
+                _search_task_id(at, 0).run()
+            runs[scope] = (_time_interaction(at, action, reruns), _element_count(at._tree))
+
+        full_s, full_elements = runs["full"]
+        fragment_s, fragment_elements = runs["fragment"]
+        results.append({
+            "interaction": name,
+            "fragment": panel,
+            "full_rerun_s": round(full_s, 4),
+            "fragment_rerun_s": round(fragment_s, 4),
+            "saved_pct": round(100 * (1 - fragment_s / full_s), 1) if full_s else 0.0,
+            "full_elements": full_elements,
+            "fragment_elements": fragment_elements,
+        })
+    return results
+
+
+# ========================================
+# PAGES
+# ========================================
+
+PAGES = ["Dashboard Overview", "Approve Leads", "Manage Tasks"]
+
+
+def _widget_count(at):
+    from streamlit.testing.v1.element_tree import Widget
+
+    def walk(node):
+        children = getattr(node, "children", None) or {}
+        return isinstance(node, Widget) + sum(walk(child) for child in children.values())
+    return walk(at._tree)
+
+
+def _search_leads(at, i):
+    search = [box for box in at.text_input if box.label.startswith("🔍 Search leads")][0]
+    return search.input(("lead 12", "place 4")[i % 2])
+
+
+def _approve_one(at, i):
+    # A different lead each time: approving clears the selection
+    at.checkbox(key=f"cora_leads_check_{i + 1}").check().run()
+    return at.button(key="approve_bottom").click()
+
+
+# (page, interaction, widget action); each action must be repeatable
+PAGE_INTERACTIONS = [
+    ("Approve Leads", "search leads", _search_leads),
+    ("Approve Leads", "tick a lead", _tick_lead),
+    ("Approve Leads", "approve a lead", _approve_one),
+    ("Manage Tasks", "type a Task ID", _search_task_id),
+    ("Manage Tasks", "search active tasks", _search_active_tasks),
+]
+
+
+def _refresh_app():
+    # Runs inside AppTest so the refresh sees the benchmark's secrets
+    from refresher import refresh_dataset
+    refresh_dataset("cora")
+    refresh_dataset("opsi")
+
+
+def _page_app(page, secrets):
+    at = AppTest.from_file(os.path.join(REPO_DIR, "dashboard.py"), default_timeout=300)
+    at.session_state["selected_page"] = page
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    return at
+
+
+def _peak_memory_mb(step):
+    """Peak Python allocation while ``step`` runs (in its own pass, since tracing slows it)"""
+    tracemalloc.start()
+    try:
+        step()
+        return round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+    finally:
+        tracemalloc.stop()
+
+
+def bench_pages(sizes=(100, 10_000, 100_000), reruns=3):
+    """Time, peak memory and widget count of every page and its hot interactions"""
+    from n8n_stub import N8nStub
+
+    stub = N8nStub().start()
+    results = []
+    try:
+        for n in sizes:
+            secrets = install_fake_sheets(make_leads(n), make_tasks(n))
+            secrets["N8N_WEBHOOK_BASE_URL"] = stub.base_url
+
+            # Publish both data sets through the real sync + normalize path
+            at = AppTest.from_function(_refresh_app, default_timeout=300)
+            for key, value in secrets.items():
+                at.secrets[key] = value
+            start = time.perf_counter()
+            at.run()
+            load_s = time.perf_counter() - start
+
+            for page in PAGES:
+                at = _page_app(page, secrets)
+                start = time.perf_counter()
+                at.run()
+                first = time.perf_counter() - start
+                if at.exception:
+                    raise RuntimeError(f"{page}: {at.exception[0].value}")
+                timings = []
+                for _ in range(reruns):
+                    start = time.perf_counter()
+                    at.run()
+                    timings.append(time.perf_counter() - start)
+                results.append({
+                    "rows": n,
+                    "page": page,
+                    "interaction": None,
+                    "load_s": round(load_s, 4),
+                    "first_run_s": round(first, 4),
+                    "rerun_s": round(sorted(timings)[len(timings) // 2], 4),
+                    "peak_mb": _peak_memory_mb(_page_app(page, secrets).run),
+                    "widgets": _widget_count(at),
+                    "elements": _element_count(at._tree),
+                })
+
+            for page, name, action in PAGE_INTERACTIONS:
+                at = _page_app(page, secrets)
+                at.run()
+                sent_before = len(stub.requests)
+                rerun_s = _time_interaction(at, action, reruns)
+                peak_mb = _peak_memory_mb(lambda: action(at, reruns).run())
+                results.append({
+                    "rows": n,
+                    "page": page,
+                    "interaction": name,
+                    "rerun_s": round(rerun_s, 4),
+                    "peak_mb": peak_mb,
+                    "widgets": _widget_count(at),
+                    "elements": _element_count(at._tree),
+                    "webhook_calls": len(stub.requests) - sent_before,
+                })
+    finally:
+        stub.stop()
+    return results
+
+
+# ========================================
+# OPSI WRITE BACKENDS
+# ========================================
+
+def bench_writes(rows=1_000, runs=5, latency=0.2, n8n_latency=1.0, batch=200):
+    """Time task writes through n8n (the stub) versus straight to a (fake) sheet.
+
+    ``latency`` is one Sheets API round-trip and ``n8n_latency`` the extra
+    hop plus workflow run. Also checks the sheets backend's writes landed.
+    """
+    import uuid
+    from n8n_stub import N8nStub
+    from webhooks import WebhookClient
+    from task_writes import N8nTaskWrites, SheetsTaskWrites
+    from utils import _opsi_row_values
+
+    stub = N8nStub(latency=n8n_latency).start()
+    client = WebhookClient(base_url=stub.base_url, retries=0)
+    worksheet = FakeWorksheet(sheet_values(make_tasks(rows)), latency)
+    backends = {
+        "n8n": N8nTaskWrites(lambda: client, batch_endpoint="opsi-update-tasks"),
+        "sheets": SheetsTaskWrites(lambda: [worksheet], _opsi_row_values),
+    }
+    operations = [
+        ("create", lambda backend, i: backend.create(
+            {"title": f"Bench task {i}", "taskType": "Follow-up", "priority": "Low"}, uuid.uuid4().hex)),
+        ("update 1", lambda backend, i: backend.update(
+            [{"taskId": f"OPSI-{i:06d}", "status": "On Hold"}], uuid.uuid4().hex)),
+        (f"update {batch}", lambda backend, i: backend.update(
+            [{"taskId": f"OPSI-{j:06d}", "status": "Completed"} for j in range(batch)], uuid.uuid4().hex)),
+    ]
+
+    results = []
+    try:
+        for name, backend in backends.items():
+            for operation, call in operations:
+                timings = []
+                for i in range(runs):
+                    start = time.perf_counter()
+                    outcome = call(backend, i)
+                    timings.append(time.perf_counter() - start)
+                    failed = not outcome[0] if operation == "create" else outcome[0]
+                    if failed:
+                        raise RuntimeError(f"{name} {operation} failed: {outcome}")
+                results.append({
+                    "backend": name,
+                    "operation": operation,
+                    "median_s": round(sorted(timings)[len(timings) // 2], 4),
+                })
+    finally:
+        stub.stop()
+
+    status = list(make_tasks(0).columns).index("Status")
+    assert all(row[status] == "Completed" for row in worksheet.values[1:batch + 1]), "bulk update didn't land"
+    assert len(worksheet.values) == rows + 1 + runs, "creates didn't append one row each"
+    return results
+
+
+# ========================================
+# SHARDED DATASETS
+# ========================================
+
+def bench_shards(rows=100_000, runs=3, latency=0.2, shards=4):
+    """Load one tab of ``rows`` tasks versus the same tasks split over ``shards`` tabs.
+
+    Shards overlap by one row each, to exercise de-duplication. Times the
+    cold load (full reads) and an unchanged refresh (one delta read per tab,
+    and the merged frame reused).
+    """
+    import uuid
+    from sync import SheetShard, load_shards
+    from schema import OPSI_SCHEMA
+
+    tasks = make_tasks(rows)
+    bounds = [round(rows * i / shards) for i in range(shards + 1)]
+    layouts = {
+        "1 tab": [tasks],
+        f"{shards} tabs": [tasks.iloc[max(start - 1, 0):stop] for start, stop in zip(bounds, bounds[1:])],
+    }
+
+    results = []
+    for layout, parts in layouts.items():
+        cold, warm = [], []
+        for _ in range(runs):
+            # Fresh sheet keys so every run starts from an empty sync
+            run = uuid.uuid4().hex[:8]
+            worksheets = {
+                SheetShard(f"bench-{run}", f"Tasks {i}"): FakeWorksheet(sheet_values(part), latency)
+                for i, part in enumerate(parts)
+            }
+            shard_list = list(worksheets)
+
+            def load():
+                return load_shards(run, shard_list, worksheets.get, "Task ID", rename=OPSI_SCHEMA.rename)
+
+            start = time.perf_counter()
+            merged = load()
+            cold.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            again = load()
+            warm.append(time.perf_counter() - start)
+
+            assert len(merged) == rows, f"{layout}: merged {len(merged)} rows, expected {rows}"
+            assert again is merged, f"{layout}: unchanged refresh rebuilt the merged frame"
+        results.append({
+            "layout": layout,
+            "rows": rows,
+            "cold_s": round(sorted(cold)[len(cold) // 2], 4),
+            "unchanged_refresh_s": round(sorted(warm)[len(warm) // 2], 4),
+        })
+    return results
+
+
+def write_results(suite, results, output=None):
+    """Write results plus run metadata as JSON and return the file path"""
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(REPO_DIR, ".cache", "benchmarks", f"{suite}-{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    import streamlit
+    payload = {
+        "suite": suite,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "streamlit": streamlit.__version__,
+        "pandas": pd.__version__,
+        "results": results,
+    }
+    with open(output, "w") as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("suite", choices=["grid", "startup", "fragments", "pages", "writes", "shards"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=1_000)
+    parser.add_argument("--latency", type=float, default=0.2, help="simulated seconds per sheet read")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 10_000, 100_000])
+    parser.add_argument("--n8n-latency", type=float, default=1.0, help="simulated n8n hop + workflow seconds (writes suite)")
+    parser.add_argument("--shards", type=int, default=4, help="tabs to split the tasks over (shards suite)")
+    parser.add_argument("--output", help="JSON results path (pages suite)")
+    args = parser.parse_args()
+
+    if args.suite == "grid":
+        for row in bench_grid():
+            print(row)
+    elif args.suite == "startup":
+        print(bench_startup(args.runs, args.rows, args.latency))
+    elif args.suite == "fragments":
+        isolate_caches()
+        for row in bench_fragments(args.rows, args.runs):
+            print(row)
+    elif args.suite == "writes":
+        isolate_caches()
+        for row in bench_writes(args.rows, args.runs, args.latency, args.n8n_latency):
+            print(row)
+    elif args.suite == "shards":
+        isolate_caches()
+        for row in bench_shards(args.rows, args.runs, args.latency, args.shards):
+            print(row)
+    else:
+        isolate_caches()
+        results = bench_pages(args.sizes, args.runs)
+        for row in results:
+            print(row)
+        print(f"Wrote {write_results('pages', results, args.output)}")
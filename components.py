@@ -0,0 +1,617 @@
+import streamlit as st
+import pandas as pd
+from datetime import datetime
+from schema import format_date
+from telemetry import timed, span
+from export import EXPORT_FORMATS, export_frame
+from utils import (
+    load_opsi_data, get_task_id_index, get_task_table, queue_opsi_task, queue_opsi_update, queue_opsi_updates,
+    refresh_cora_data, queue_lead_approval
+)
+
+# ========================================
+# LEAD SELECTION GRID
+# ========================================
+
+LEAD_PAGE_SIZES = [25, 50, 100]
+
+
+def _selected_leads(key):
+    """Return the session's set of selected Lead IDs for a grid"""
+    state_key = f"{key}_selected"
+    if state_key not in st.session_state:
+        st.session_state[state_key] = set()
+    return st.session_state[state_key]
+
+
+def _toggle_lead(key, lead_id, widget_key):
+    selected = _selected_leads(key)
+    if st.session_state[widget_key]:
+        selected.add(lead_id)
+    else:
+        selected.discard(lead_id)
+
+
+def _select_leads(key, lead_ids):
+    lead_ids = lead_ids.fillna("").astype(str)
+    _selected_leads(key).update(lead_ids[lead_ids != ""])
+
+
+def _clear_leads(key):
+    _selected_leads(key).clear()
+
+
+def lead_selection_grid(df, key="leads"):
+    """Render one page of leads with selection checkboxes.
+
+    Selection lives in session state as a set of Lead IDs, so widgets are only
+    created for the visible page and "Select All" never creates one per lead.
+    Checkboxes are keyed by row position, since IDs can repeat or be blank.
+    Returns the selected set.
+    """
+    selected = _selected_leads(key)
+
+    col1, col2, col3, col4 = st.columns([2, 2, 1.5, 1.5])
+    with col1:
+        st.button(
+            f"☑️ Select All ({len(df)})",
+            on_click=_select_leads,
+            args=(key, df["Lead ID"]),
+            use_container_width=True,
+            key=f"{key}_select_all",
+        )
+    with col2:
+        st.button(
+            "✖️ Clear Selection",
+            on_click=_clear_leads,
+            args=(key,),
+            use_container_width=True,
+            key=f"{key}_clear",
+        )
+    with col3:
+        page_size = st.selectbox("Per page", LEAD_PAGE_SIZES, index=1, key=f"{key}_page_size")
+    with col4:
+        pages = max((len(df) - 1) // page_size + 1, 1)
+        # A narrower search can leave the stored page past the end
+        if st.session_state.get(f"{key}_page", 1) > pages:
+            st.session_state[f"{key}_page"] = pages
+        page = st.number_input("Page", min_value=1, max_value=pages, key=f"{key}_page")
+
+    start = (page - 1) * page_size
+    page_df = df.iloc[start:start + page_size]
+    page_ids = page_df["Lead ID"].fillna("").astype(str).tolist()
+    missing = ["N/A"] * len(page_df)
+    st.caption(f"Showing {start + 1 if len(df) else 0}–{start + len(page_df)} of {len(df)} leads")
+
+    with st.container(height=500):
+        # Read whole page columns instead of building a dict per row
+        for position, lead_id, name, organization, email in zip(
+            range(start, start + len(page_df)),
+            page_ids,
+            page_df.get("Name", missing),
+            page_df.get("Organization", missing),
+            page_df.get("Email", missing),
+        ):
+            col1, col2, col3, col4, col5 = st.columns([0.5, 2, 2.5, 2, 1.5])
+
+            with col1:
+                widget_key = f"{key}_check_{position}"
+                # Sync the widget from the selection set so Select All / Clear are reflected
+                st.session_state[widget_key] = lead_id in selected
+                st.checkbox(
+                    "✓",
+                    key=widget_key,
+                    on_change=_toggle_lead,
+                    args=(key, lead_id, widget_key),
+                    disabled=not lead_id,
+                    label_visibility="collapsed",
+                )
+
+            with col2:
+                st.write(f"**{name}**")
+
+            with col3:
+                st.write(organization)
+
+            with col4:
+                st.write(email[:25] + '...' if len(str(email)) > 25 else email)
+
+            with col5:
+                st.code(lead_id or 'N/A', language=None)
+
+    return selected
+
+
+# ========================================
+# LEAD APPROVAL PANEL
+# ========================================
+
+@st.fragment
+@timed("panel.lead_approval")
+def lead_approval_panel(filtered):
+    """Lead grid plus approve controls for the (already searched) leads.
+
+    A fragment: ticking a lead, paging or approving reruns only this panel.
+    """
+    st.markdown("### Select Leads to Approve")
+
+    # TOP APPROVE BUTTON
+    col1, col2, col3 = st.columns([2, 2, 2])
+    with col1:
+        if st.button("🔄 Refresh Data", use_container_width=True, key="refresh_top"):
+            refresh_cora_data()
+            st.rerun()
+    with col2:
+        approve_btn_top = st.button(
+            "✅ Approve Selected Leads",
+            type="primary",
+            use_container_width=True,
+            key="approve_top"
+        )
+
+    st.markdown("---")
+
+    # Only the visible page gets widgets; selection is kept as a set of Lead IDs
+    selected_lead_ids = sorted(lead_selection_grid(filtered, key="cora_leads"))
+
+    st.markdown("---")
+
+    # Approval controls
+    col1, col2, col3 = st.columns([2, 2, 2])
+
+    with col1:
+        st.metric("Selected", len(selected_lead_ids))
+
+    with col2:
+        approve_btn_bottom = st.button(
+            "✅ Approve Selected Leads",
+            type="primary",
+            use_container_width=True,
+            disabled=len(selected_lead_ids) == 0,
+            key="approve_bottom"
+        )
+
+    with col3:
+        if st.button("🔄 Refresh Data", use_container_width=True):
+            refresh_cora_data()
+            st.rerun()
+
+    # Handle approval from either button
+    if approve_btn_top or approve_btn_bottom:
+        if selected_lead_ids:
+            # Queued in the outbox; the background worker sends it to MARK
+            queue_lead_approval(selected_lead_ids)
+            st.success(f"✅ Queued {len(selected_lead_ids)} lead(s) for approval!")
+            st.info("🤖 MARK will send outreach emails shortly. Track delivery under 📤 Outbox in the sidebar.")
+            # Clear the selection so a second click can't queue the same leads again
+            st.session_state.cora_leads_selected = set()
+
+            # Show approved leads
+            with st.expander("View Approved Leads"):
+                for lead_id in selected_lead_ids:
+                    st.write(f"• {lead_id}")
+        else:
+            st.warning("⚠️ Please select at least one lead to approve")
+
+
+# ========================================
+# EXPORT
+# ========================================
+
+@st.fragment
+def export_panel(frame, basename, key):
+    """Format picker and download button; the file is built only when clicked"""
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        fmt = st.selectbox(
+            "Export format",
+            list(EXPORT_FORMATS),
+            format_func=lambda name: EXPORT_FORMATS[name].label,
+            key=f"{key}_format",
+            label_visibility="collapsed",
+        )
+    export_format = EXPORT_FORMATS[fmt]
+
+    def build():
+        # Runs on Streamlit's download thread, reading the frame in chunks
+        with span(f"export.{fmt}"):
+            return export_frame(frame, fmt)
+
+    with col2:
+        st.download_button(
+            f"📥 Export to {export_format.label}",
+            build,
+            f"{basename}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format.extension}",
+            export_format.mime,
+            key=f"{key}_download",
+            on_click="ignore",
+        )
+
+
+# ========================================
+# TASK PANELS
+# ========================================
+# Each panel reads the current OPSI snapshot itself, so a fragment-only rerun
+# never works from a frame captured by an older full run.
+
+@st.fragment
+@timed("panel.task_create")
+def task_create_panel():
+    """Create-task form; submitting reruns only this panel until the task is queued"""
+    # Show success message if it exists in session state
+    if 'create_success_msg' in st.session_state:
+        st.success(st.session_state.create_success_msg)
+        del st.session_state.create_success_msg
+
+    with st.expander("➕ Create New Task", expanded=False):
+        with st.form("task_form"):
+
+            title = st.text_input("Task Title*")
+
+            task_type = st.selectbox(
+                "Task Type*",
+                ["Select option", "RFP Submission", "Contract Renewal", "Audit", "Compliance Report", "Other"]
+            )
+
+            assigned_to = st.text_input("Assigned To*", placeholder="Enter person name")
+
+            deadline = st.date_input("Deadline Date*")
+
+            priority = st.selectbox(
+                "Priority*",
+                ["Select option", "High", "Medium", "Low"]
+            )
+
+            notes = st.text_area("Notes")
+
+            submitted = st.form_submit_button("Create Task")
+
+            if submitted:
+                errors = []
+
+                if not title.strip():
+                    errors.append("Task title is required.")
+                if task_type == "Select option":
+                    errors.append("Task type is required.")
+                if priority == "Select option":
+                    errors.append("Priority is required.")
+                if not assigned_to.strip():
+                    errors.append("Assigned To is required.")
+
+                if errors:
+                    for e in errors:
+                        st.error(e)
+                else:
+                    task_data = {
+                        "title": title,
+                        "taskType": task_type,
+                        "assignedTo": assigned_to,
+                        "deadline": str(deadline),
+                        "priority": priority,
+                        "notes": notes,
+                    }
+
+                    # Queued in the outbox and shown straight away; n8n is called in the background
+                    result = queue_opsi_task(task_data)
+
+                    if result:
+                        # Store success message in session state before rerun
+                        st.session_state.create_success_msg = f"✅ Task '{title}' created successfully!"
+                        st.markdown("""
+                        <script>
+                            window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
+                        </script>
+                        """, unsafe_allow_html=True)
+                        st.rerun()
+                    else:
+                        st.error("❌ Failed to create task. Check that the OPSI webhook is running in n8n.")
+
+
+@st.fragment
+@timed("panel.task_update")
+def task_update_panel():
+    """Task ID search, task picker and update form"""
+    opsi_df = load_opsi_data()
+
+    # Columns are normalized at load time (aliases, trailing spaces, dtypes)
+    status_col = "Status"
+    priority_col = "Priority"
+    task_id_col = "Task ID"
+    task_title_col = "Task Title"
+
+    # Show success message if it exists in session state
+    if 'update_success_msg' in st.session_state:
+        st.success(st.session_state.update_success_msg)
+        del st.session_state.update_success_msg
+
+    # Keep expander open if search is active OR task is selected
+    is_expanded = (st.session_state.get('task_id_search', '') != '' or
+                   st.session_state.get('selected_task_id') is not None)
+
+    with st.expander("✏️ Update Task", expanded=is_expanded):
+        st.markdown("**Select a task to update**")
+
+        # Initialize session state for search
+        if 'task_id_search' not in st.session_state:
+            st.session_state.task_id_search = ""
+
+        # Search Task ID field
+        task_id_search = st.text_input(
+            "🔍 Search Task ID:",
+            value=st.session_state.task_id_search,
+            placeholder="Enter Task ID to filter...",
+            key="task_id_search_input"
+        )
+
+        # Update session state
+        st.session_state.task_id_search = task_id_search
+
+        # Filter tasks based on search
+        if not opsi_df.empty and task_id_col in opsi_df.columns and task_title_col in opsi_df.columns:
+            # Prebuilt per data version: prefix search, labels and ID lookup without scanning rows
+            task_index = get_task_id_index(opsi_df)
+            matches = task_index.prefix(task_id_search)
+
+            if len(matches):
+                # Initialize selected task in session state
+                if 'selected_task_id' not in st.session_state:
+                    st.session_state.selected_task_id = None
+
+                # Get the current index for the selectbox
+                current_index = task_index.option_index(matches, st.session_state.selected_task_id) or 0
+
+                # The prebuilt labels are the options, so no format_func runs per option
+                selected_label = st.selectbox(
+                    "Select Task:",
+                    options=task_index.labels[matches].tolist(),
+                    index=current_index,
+                    key="task_selector_fixed"
+                )
+                selected_position = task_index.label_position(selected_label)
+                selected_task_id = task_index.ids[selected_position] if selected_position is not None else None
+
+                if selected_task_id:
+                    st.session_state.selected_task_id = selected_task_id
+
+                    # Get current task details
+                    task_row = opsi_df.iloc[selected_position]
+
+                    col1, col2 = st.columns(2)
+
+                    with col1:
+                        st.markdown("**Current Details:**")
+                        st.write(f"**Task Type:** {task_row.get('Task Type', 'N/A')}")
+                        st.write(f"**Title:** {task_row[task_title_col]}")
+                        st.write(f"**Status:** {task_row[status_col]}")
+                        st.write(f"**Priority:** {task_row[priority_col]}")
+                        st.write(f"**Assigned To:** {task_row.get('Assigned To', 'N/A')}")
+                        st.write(f"**Deadline:** {format_date(task_row.get('Deadline Date'))}")
+
+                    with col2:
+                        st.markdown("**Update:**")
+
+                        # Initialize session state for form fields
+                        if f'form_title_{selected_task_id}' not in st.session_state:
+                            st.session_state[f'form_title_{selected_task_id}'] = task_row[task_title_col]
+                        if f'form_assigned_{selected_task_id}' not in st.session_state:
+                            st.session_state[f'form_assigned_{selected_task_id}'] = task_row.get('Assigned To', '')
+                        if f'form_deadline_{selected_task_id}' not in st.session_state:
+                            # Parsed to datetime64 at load time; blank or invalid deadlines are NaT
+                            current_deadline = task_row.get('Deadline Date')
+                            if pd.notna(current_deadline):
+                                st.session_state[f'form_deadline_{selected_task_id}'] = current_deadline.date()
+                            else:
+                                st.session_state[f'form_deadline_{selected_task_id}'] = datetime.now().date()
+
+                        # Title input
+                        new_title = st.text_input(
+                            "Title:",
+                            value=st.session_state[f'form_title_{selected_task_id}'],
+                            key=f"new_title_{selected_task_id}"
+                        )
+
+                        # Assigned To input
+                        new_assigned_to = st.text_input(
+                            "Assigned To:",
+                            value=st.session_state[f'form_assigned_{selected_task_id}'],
+                            key=f"new_assigned_to_{selected_task_id}"
+                        )
+
+                        # Deadline input
+                        new_deadline = st.date_input(
+                            "Deadline:",
+                            value=st.session_state[f'form_deadline_{selected_task_id}'],
+                            key=f"new_deadline_{selected_task_id}"
+                        )
+
+                        # Status selection
+                        current_status_index = 0
+                        status_options = ["New", "In Progress", "Completed", "On Hold", "Cancelled"]
+                        if task_row[status_col] in status_options:
+                            current_status_index = status_options.index(task_row[status_col])
+
+                        new_status = st.selectbox(
+                            "Status:",
+                            options=status_options,
+                            index=current_status_index,
+                            key=f"new_status_select_{selected_task_id}"
+                        )
+
+                        # Priority selection
+                        current_priority_index = 1
+                        priority_options = ["High", "Medium", "Low"]
+                        if task_row[priority_col] in priority_options:
+                            current_priority_index = priority_options.index(task_row[priority_col])
+
+                        new_priority = st.selectbox(
+                            "Priority:",
+                            options=priority_options,
+                            index=current_priority_index,
+                            key=f"new_priority_select_{selected_task_id}"
+                        )
+
+                        update_notes = st.text_area(
+                            "Notes:",
+                            value=task_row.get('Notes', ''),
+                            key=f"update_notes_{selected_task_id}"
+                        )
+
+                        if st.button("💾 Update Task", type="primary", use_container_width=True, key=f"update_btn_{selected_task_id}"):
+                            update_data = {
+                                "taskId": selected_task_id,
+                                "taskType": task_row.get('Task Type', 'RFP Submission'),
+                                "title": new_title,
+                                "assignedTo": new_assigned_to,
+                                "deadline": str(new_deadline),
+                                "status": new_status,
+                                "priority": new_priority,
+                                "notes": update_notes
+                            }
+
+                            result = queue_opsi_update(update_data)
+
+                            if result:
+                                # Store success message in session state before rerun
+                                st.session_state.update_success_msg = f"✅ Task {selected_task_id} updated successfully!"
+                                # Clear search and selection on successful update
+                                st.session_state.task_id_search = ""
+                                st.session_state.selected_task_id = None
+                                st.markdown("""
+                                <script>
+                                    window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
+                                </script>
+                                """, unsafe_allow_html=True)
+                                st.rerun()
+                            else:
+                                st.error("❌ Failed to update task")
+            else:
+                st.warning(f"⚠️ No tasks found matching '{task_id_search}'")
+        else:
+            st.warning("⚠️ Task ID or Title column not found in data")
+
+
+TASK_STATUS_OPTIONS = ["New", "In Progress", "Completed", "On Hold", "Cancelled"]
+TASK_PRIORITY_OPTIONS = ["High", "Medium", "Low"]
+
+
+def _column_values(df, column):
+    """Distinct values of a (usually categorical) column, for filter pickers"""
+    if column not in df.columns:
+        return []
+    return sorted(str(value) for value in df[column].dropna().unique())
+
+
+@st.fragment
+@timed("panel.bulk_update")
+def bulk_update_panel():
+    """Apply one status, priority, assignee or deadline change to every task matching a filter"""
+    opsi_df = load_opsi_data()
+
+    if 'bulk_update_msg' in st.session_state:
+        st.success(st.session_state.bulk_update_msg)
+        del st.session_state.bulk_update_msg
+
+    with st.expander("🗂️ Bulk Update Tasks"):
+        if opsi_df.empty or "Task ID" not in opsi_df.columns:
+            st.info("No tasks to update.")
+            return
+
+        table = get_task_table(opsi_df)
+
+        st.markdown("**1. Select tasks**")
+        col1, col2, col3 = st.columns([2, 1.5, 1.5])
+        with col1:
+            search = st.text_input("Title, assignee or type contains:", key="bulk_search")
+        with col2:
+            statuses = st.multiselect("Status is:", _column_values(opsi_df, "Status"), key="bulk_status")
+        with col3:
+            priorities = st.multiselect("Priority is:", _column_values(opsi_df, "Priority"), key="bulk_priority")
+
+        if not (search.strip() or statuses or priorities):
+            st.caption("Pick at least one filter to select tasks.")
+            return
+
+        rows = table.matching(search, {"Status": statuses, "Priority": priorities})
+        selected = opsi_df if rows is None else opsi_df.iloc[rows]
+        st.caption(f"{len(selected)} task(s) selected")
+        preview_columns = [c for c in ["Task ID", "Task Title", "Status", "Priority", "Assigned To", "Deadline Date"] if c in selected.columns]
+        st.dataframe(selected[preview_columns].head(20), hide_index=True, use_container_width=True)
+
+        st.markdown("**2. Choose the change**")
+        col1, col2, col3, col4 = st.columns(4)
+        changes = {}
+        with col1:
+            if st.checkbox("Set status", key="bulk_set_status"):
+                changes["status"] = st.selectbox("Status:", TASK_STATUS_OPTIONS, key="bulk_new_status")
+        with col2:
+            if st.checkbox("Set priority", key="bulk_set_priority"):
+                changes["priority"] = st.selectbox("Priority:", TASK_PRIORITY_OPTIONS, key="bulk_new_priority")
+        with col3:
+            if st.checkbox("Set assignee", key="bulk_set_assignee"):
+                changes["assignedTo"] = st.text_input("Assigned To:", key="bulk_new_assignee")
+        with col4:
+            if st.checkbox("Set deadline", key="bulk_set_deadline"):
+                changes["deadline"] = str(st.date_input("Deadline:", key="bulk_new_deadline"))
+
+        if st.button(
+            f"💾 Update {len(selected)} task(s)",
+            type="primary",
+            use_container_width=True,
+            disabled=not changes or selected.empty,
+            key="bulk_update_btn",
+        ):
+            task_ids = selected["Task ID"].astype(str).tolist()
+            # One outbox write, sent in chunks by the configured OPSI write backend
+            queue_opsi_updates(
+                [{"taskId": task_id, **changes} for task_id in task_ids],
+                label=f"Bulk update {len(task_ids)} task(s)",
+            )
+            st.session_state.bulk_update_msg = (
+                f"✅ Queued an update for {len(task_ids)} task(s). Track per-task results under 📤 Outbox in the sidebar."
+            )
+            st.rerun()
+
+
+TASK_PAGE_SIZES = [25, 50, 100, 250]
+
+
+@st.fragment
+@timed("panel.active_tasks")
+def active_tasks_panel():
+    """Searchable, sortable table of every task, rendered one page at a time"""
+    opsi_df = load_opsi_data()
+
+    if not opsi_df.empty:
+        table = get_task_table(opsi_df)
+
+        # Add search/filter
+        search_task = st.text_input("🔍 Search tasks by title, assignee, or type...", key="task_search")
+
+        col1, col2, col3, col4 = st.columns([2, 1.5, 1.5, 1.5])
+        with col1:
+            sort = st.selectbox(
+                "Sort by",
+                [None] + table.sort_columns,
+                format_func=lambda column: "Sheet order" if column is None else column,
+                key="task_sort",
+            )
+        with col2:
+            descending = st.toggle("Descending", key="task_sort_desc", disabled=sort is None)
+        with col3:
+            page_size = st.selectbox("Per page", TASK_PAGE_SIZES, index=1, key="task_page_size")
+        with col4:
+            page_number = st.session_state.get("task_page", 1)
+            result = table.query(search_task, sort, descending, page_number, page_size)
+            # A narrower search can leave the stored page past the end
+            if page_number != result.page:
+                st.session_state["task_page"] = result.page
+            st.number_input("Page", min_value=1, max_value=result.pages, key="task_page")
+
+        st.caption(
+            f"Showing {result.start + 1 if result.total else 0}–{result.start + len(result.frame)} "
+            f"of {result.total} tasks"
+        )
+        # Only the requested page is sent to the browser
+        st.dataframe(result.frame, hide_index=True, use_container_width=True)
+    else:
+        st.info("No tasks found. Create your first task above.")
@@ -1,13 +1,38 @@
 import streamlit as st
 import pandas as pd
-from utils import load_cora_data
+from query import filter_frame
+from utils import load_cora_data, get_agent_health
 
 def get_cora_status():
-    """Return CORA agent status"""
-    return "Active"
+    """Return CORA agent status (Active, Idle or Offline) from the latest health probes"""
+    return get_cora_health()[0]
+
+def get_cora_health():
+    """Return (CORA status, probe details) without waiting on any probe"""
+    return get_agent_health("CORA")
+
+def get_cora_frame():
+    """CORA leads as a shallow view of the shared snapshot; edits copy first (Copy-on-Write)"""
+    try:
+        return load_cora_data()
+    except:
+        return pd.DataFrame()
+
+def get_cora_column(name, default=None):
+    """One lead column as a Series view, or ``default`` if the sheet lacks it"""
+    df = get_cora_frame()
+    return df[name] if name in df.columns else default
+
+def get_recent_leads(n=5, df=None):
+    """First ``n`` leads as a frame slice"""
+    return (get_cora_frame() if df is None else df).head(n)
+
+def filter_cora_leads(df=None, limit=None, **isin):
+    """CORA leads filtered by ``query.filter_frame``, e.g. ``filter_cora_leads(Status="Qualified")``"""
+    return filter_frame(get_cora_frame() if df is None else df, limit=limit, **isin)
 
 def get_cora_leads():
-    """Get CORA leads as list of dictionaries"""
+    """Get CORA leads as list of dictionaries (prefer get_cora_frame; this copies every row)"""
     try:
         df = load_cora_data()
         return df.to_dict('records') if not df.empty else []
@@ -1,10 +1,16 @@
 import streamlit as st
 from datetime import datetime
-import pandas as pd
-from cora import get_cora_status, get_cora_leads
-from mark import get_mark_status
-from opsi import get_opsi_status, load_opsi_tasks
-from utils import load_cora_data, send_approved_leads_to_mark, load_opsi_data, send_opsi_task, update_opsi_task
+from cora import get_cora_health, get_recent_leads
+from mark import get_mark_health
+from opsi import get_opsi_health, filter_opsi_tasks
+from components import lead_approval_panel, task_create_panel, task_update_panel, active_tasks_panel, export_panel, bulk_update_panel
+from search import search_frame
+from schema import format_date
+from utils import (
+    load_cora_data, load_datasets, get_lead_search_index, load_opsi_data, get_lead_metrics, get_task_metrics,
+    get_outbox_status, retry_outbox_item, start_metrics_endpoint
+)
+from telemetry import SectionTimer
 
 # ========================================
 # PAGE CONFIGURATION
@@ -16,6 +22,11 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Span timings and cache counters at http://127.0.0.1:9464/metrics (METRICS_PORT)
+start_metrics_endpoint()
+# Times each page section below as "page.<section>"
+sections = SectionTimer("page")
+
 # ========================================
 # CUSTOM STYLING
 # ========================================
@@ -70,6 +81,7 @@ st.markdown("""
 # ========================================
 # SIDEBAR NAVIGATION
 # ========================================
+sections.start("sidebar")
 with st.sidebar:
     st.markdown("### ⚡ ApexxAdams")
     st.markdown("**Multi-Agent Command Center**")
@@ -95,10 +107,10 @@ with st.sidebar:
     st.markdown("---")
     st.markdown("### 📊 System Status")
     
-    # Get agent statuses dynamically
-    cora_status = get_cora_status()
-    mark_status = get_mark_status()
-    opsi_status = get_opsi_status()
+    # Get agent statuses from cached health probes (refreshed in the background)
+    cora_status, cora_health = get_cora_health()
+    mark_status, mark_health = get_mark_health()
+    opsi_status, opsi_health = get_opsi_health()
     
     # Map status to CSS class
     status_class_map = {
@@ -107,9 +119,31 @@ with st.sidebar:
         "Offline": "status-offline"
     }
     
-    st.markdown(f'<span class="{status_class_map.get(cora_status, "status-offline")}">● CORA: {cora_status}</span>', unsafe_allow_html=True)
-    st.markdown(f'<span class="{status_class_map.get(mark_status, "status-offline")}">● MARK: {mark_status}</span>', unsafe_allow_html=True)
-    st.markdown(f'<span class="{status_class_map.get(opsi_status, "status-offline")}">● OPSI: {opsi_status}</span>', unsafe_allow_html=True)
+    st.markdown(f'<span class="{status_class_map.get(cora_status, "status-offline")}">● CORA: {cora_status}</span>', unsafe_allow_html=True, help="\n\n".join(cora_health))
+    st.markdown(f'<span class="{status_class_map.get(mark_status, "status-offline")}">● MARK: {mark_status}</span>', unsafe_allow_html=True, help="\n\n".join(mark_health))
+    st.markdown(f'<span class="{status_class_map.get(opsi_status, "status-offline")}">● OPSI: {opsi_status}</span>', unsafe_allow_html=True, help="\n\n".join(opsi_health))
+    
+    st.markdown("---")
+    st.markdown("### 📤 Outbox")
+    
+    # Writes are queued and sent in the background; show where each one is
+    outbox_counts, outbox_items = get_outbox_status()
+    st.caption(
+        f"⏳ {outbox_counts.get('pending', 0) + outbox_counts.get('sending', 0)} pending • "
+        f"✅ {outbox_counts.get('sent', 0)} sent • "
+        f"❌ {outbox_counts.get('failed', 0)} failed"
+    )
+    outbox_icons = {"pending": "⏳", "sending": "📨", "sent": "✅", "failed": "❌"}
+    with st.expander("Recent writes", expanded=outbox_counts.get('failed', 0) > 0):
+        if not outbox_items:
+            st.caption("Nothing queued yet.")
+        for item in outbox_items:
+            progress_note = f" ({item['progress']})" if item['progress'] and item['status'] != "sent" else ""
+            st.write(f"{outbox_icons.get(item['status'], '•')} {item['label']}{progress_note}")
+            if item['last_error'] and item['status'] != "sent":
+                st.caption(f"Attempt {item['attempts']}: {item['last_error']}")
+            if item['status'] == "failed":
+                st.button("Retry", key=f"outbox_retry_{item['id']}", on_click=retry_outbox_item, args=(item['id'],))
     
     st.markdown("---")
     st.caption(f"v2.0 • Last updated: {datetime.now().strftime('%H:%M:%S')}")
@@ -119,6 +153,7 @@ with st.sidebar:
 # ========================================
 
 # Header
+sections.start("header")
 st.markdown('<p class="main-header" style="color: #ffffff;">⚡ ApexxAdams Multi-Agent Command Center</p>', unsafe_allow_html=True)
 st.markdown("**Your AI-Powered Business Operations Platform**")
 st.markdown("---")
@@ -133,6 +168,7 @@ if st.session_state.selected_page == "Dashboard Overview":
     # ========================================
     
     # Agent Status Cards
+    sections.start("overview.agents")
     col1, col2, col3 = st.columns(3)
     
     with col1:
@@ -174,36 +210,38 @@ if st.session_state.selected_page == "Dashboard Overview":
     st.markdown("---")
     
     # Quick Metrics
+    sections.start("overview.metrics")
     col1, col2, col3, col4 = st.columns(4)
     
     # Get data from agents
-    cora_leads = get_cora_leads()
-    opsi_tasks = load_opsi_tasks()
+    # Both sheets are fetched concurrently on a cold start
+    cora_leads, opsi_tasks = load_datasets("cora", "opsi")
+    # Precomputed once per data version; reruns only read the numbers
+    lead_metrics = get_lead_metrics(cora_leads)
+    task_metrics = get_task_metrics(opsi_tasks)
     
     with col1:
-        st.metric("Total Leads", len(cora_leads))
+        st.metric("Total Leads", lead_metrics.total)
     
     with col2:
-        qualified = sum(1 for lead in cora_leads if lead.get('Status') == 'Qualified')
-        st.metric("Qualified Leads", qualified)
+        st.metric("Qualified Leads", lead_metrics.with_status("Qualified"))
     
     with col3:
-        contacted = sum(1 for lead in cora_leads if lead.get('Status') == 'Contacted')
-        st.metric("Contacted", contacted)
+        st.metric("Contacted", lead_metrics.with_status("Contacted"))
     
     with col4:
-        pending_tasks = len([t for t in opsi_tasks.to_dict('records') if t.get('Status') == 'New' or t.get('Status ') == 'New']) if not opsi_tasks.empty else 0
-        st.metric("Pending Tasks", pending_tasks)
+        st.metric("Pending Tasks", task_metrics.with_status("New"))
     
     st.markdown("---")
     
     # Recent Activity - Two Columns
+    sections.start("overview.recent")
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.markdown("### 📊 Recent Leads")
-        if cora_leads:
-            recent_df = pd.DataFrame(cora_leads).head(5)
+        if not cora_leads.empty:
+            recent_df = get_recent_leads(5, cora_leads)
             st.dataframe(recent_df, use_container_width=True, hide_index=True)
             
             # Add Approve Leads button
@@ -216,28 +254,24 @@ if st.session_state.selected_page == "Dashboard Overview":
     with col2:
         st.markdown("### 🔥 High Priority Pending Tasks")
         if not opsi_tasks.empty:
-            # Determine column names (handle trailing spaces)
-            status_col = "Status " if "Status " in opsi_tasks.columns else "Status"
-            priority_col = "Priority " if "Priority " in opsi_tasks.columns else "Priority"
-            task_id_col = "Task ID" if "Task ID" in opsi_tasks.columns else "OPSI ID"
-            task_title_col = "Task Title" if "Task Title" in opsi_tasks.columns else "Title"
-            
             # Filter for High Priority + New/Pending status
-            high_priority_pending = opsi_tasks[
-                (opsi_tasks[priority_col] == "High") & 
-                (opsi_tasks[status_col].isin(["New", "Pending"]))
-            ].head(5)
+            high_priority_pending = filter_opsi_tasks(opsi_tasks, limit=5, Priority="High", Status=["New", "Pending"])
             
             if not high_priority_pending.empty:
-                # Display each task with quick update option
-                for idx, task in high_priority_pending.iterrows():
+                # Display each task with quick update option, reading columns rather than row dicts
+                missing = ["N/A"] * len(high_priority_pending)
+                for idx, task_title, deadline, assigned_to in zip(
+                    high_priority_pending.index,
+                    high_priority_pending.get("Task Title", missing),
+                    high_priority_pending.get("Deadline Date", [None] * len(high_priority_pending)),
+                    high_priority_pending.get("Assigned To", missing),
+                ):
                     with st.container():
                         col_a, col_b = st.columns([4, 1])
                         
                         with col_a:
-                            task_title = task.get(task_title_col, 'N/A')
                             st.write(f"**{task_title}**")
-                            st.caption(f"⏰ Deadline: {task.get('Deadline Date', 'N/A')} | 👤 {task.get('Assigned To', 'N/A')}")
+                            st.caption(f"⏰ Deadline: {format_date(deadline)} | 👤 {assigned_to}")
                         
                         with col_b:
                             # Navigate to Manage Tasks button
@@ -256,6 +290,7 @@ elif st.session_state.selected_page == "Approve Leads":
     # APPROVE LEADS PAGE
     # ========================================
     
+    sections.start("leads.summary")
     st.header("📧 Approve Leads for Outreach")
     st.write("Review and approve leads for MARK to send outreach emails")
     
@@ -265,165 +300,58 @@ elif st.session_state.selected_page == "Approve Leads":
         st.info("No leads available. Run CORA to generate leads.")
     else:
         # Metrics
+        metrics = get_lead_metrics(df)
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Leads", len(df))
+            st.metric("Total Leads", metrics.total)
         
         with col2:
-            today = datetime.now().strftime("%Y-%m-%d")
-            today_count = df["timestamp"].str.contains(today, na=False).sum() if "timestamp" in df.columns else 0
-            st.metric("Today", today_count)
+            st.metric("Today", metrics.today)
         
         with col3:
-            cities = df["organization"].str.contains("City", case=False, na=False).sum() if "organization" in df.columns else 0
-            st.metric("Cities", cities)
+            st.metric("Cities", metrics.cities)
         
         with col4:
-            churches = df["organization"].str.contains("Church", case=False, na=False).sum() if "organization" in df.columns else 0
-            st.metric("Churches", churches)
+            st.metric("Churches", metrics.churches)
         
         st.markdown("---")
         
         # ========================================
-        # APPROVE LEADS SECTION
+        # SEARCH AND FILTER
         # ========================================
-        if 'Lead ID' in df.columns:
-            st.markdown("### Select Leads to Approve")
-            
-            # Select All checkbox
-            col1, col2 = st.columns([1, 5])
-            with col1:
-                select_all = st.checkbox("Select All", key="select_all_cora")
-            with col2:
-                st.markdown("*Check the box to select all leads at once*")
-            
-            # TOP APPROVE BUTTON
-            col1, col2, col3 = st.columns([2, 2, 2])
-            with col1:
-                if st.button("🔄 Refresh Data", use_container_width=True, key="refresh_top"):
-                    st.cache_data.clear()
-                    st.rerun()
-            with col2:
-                approve_btn_top = st.button(
-                    "✅ Approve Selected Leads",
-                    type="primary",
-                    use_container_width=True,
-                    key="approve_top"
-                )
-            
-            st.markdown("---")
-            
-            # Display leads with checkboxes in container with fixed height
-            selected_lead_ids = []
-            
-            # Create scrollable container using st.container with height parameter
-            leads_container = st.container(height=500)
-            
-            with leads_container:
-                for idx, row in df.iterrows():
-                    col1, col2, col3, col4, col5 = st.columns([0.5, 2, 2.5, 2, 1.5])
-                    
-                    with col1:
-                        is_selected = st.checkbox(
-                            "✓",
-                            value=select_all,
-                            key=f"lead_check_{idx}",
-                            label_visibility="collapsed"
-                        )
-                        if is_selected:
-                            lead_id = row.get('Lead ID', '')
-                            if lead_id:
-                                selected_lead_ids.append(lead_id)
-                    
-                    with col2:
-                        st.write(f"**{row.get('Name', 'N/A')}**")
-                    
-                    with col3:
-                        st.write(row.get('Organization', 'N/A'))
-                    
-                    with col4:
-                        email = row.get('Email', 'N/A')
-                        st.write(email[:25] + '...' if len(str(email)) > 25 else email)
-                    
-                    with col5:
-                        st.code(row.get('Lead ID', 'N/A'), language=None)
-            
-            st.markdown("---")
-            
-            # Approval controls
-            col1, col2, col3 = st.columns([2, 2, 2])
-            
-            with col1:
-                st.metric("Selected", len(selected_lead_ids))
-            
-            with col2:
-                approve_btn_bottom = st.button(
-                    "✅ Approve Selected Leads",
-                    type="primary",
-                    use_container_width=True,
-                    disabled=len(selected_lead_ids) == 0,
-                    key="approve_bottom"
-                )
-            
-            with col3:
-                if st.button("🔄 Refresh Data", use_container_width=True):
-                    st.cache_data.clear()
-                    st.rerun()
-            
-            # Handle approval from either button
-            if approve_btn_top or approve_btn_bottom:
-                if selected_lead_ids:
-                    with st.spinner("Sending to MARK..."):
-                        success, response = send_approved_leads_to_mark(selected_lead_ids)
-                        
-                        if success:
-                            st.success(f"✅ Successfully approved {len(selected_lead_ids)} lead(s)!")
-                            st.info("🤖 MARK will send outreach emails shortly.")
-                            
-                            # Show approved leads
-                            with st.expander("View Approved Leads"):
-                                for lead_id in selected_lead_ids:
-                                    st.write(f"• {lead_id}")
-                        else:
-                            st.error(f"❌ Failed to send to MARK: {response}")
-                            st.info("💡 Check that the MARK webhook is running in n8n")
-                else:
-                    st.warning("⚠️ Please select at least one lead to approve")
+        # Filter first so Select All in the grid below applies to the search results
+        sections.start("leads.search")
+        col1, col2 = st.columns([5, 1])
+        with col1:
+            search = st.text_input("🔍 Search leads by name, email, or organization...")
+        with col2:
+            fuzzy = st.checkbox("Typo-tolerant", key="lead_search_fuzzy")
         
-        st.markdown("---")
+        # Prebuilt index, reused until the CORA data changes; no copy when the search is empty
+        filtered = search_frame(df, get_lead_search_index(df), search, fuzzy=fuzzy)
         
         # ========================================
-        # SEARCH AND FILTER
+        # APPROVE LEADS SECTION
         # ========================================
-        search = st.text_input("🔍 Search leads by name, email, or organization...")
-        filtered = df.copy()
+        sections.start("leads.approve")
+        if 'Lead ID' in df.columns:
+            # Reruns on its own when a lead is ticked, a page changes or leads are approved
+            lead_approval_panel(filtered)
         
-        if search:
-            mask = (
-                df["name"].str.contains(search, case=False, na=False) |
-                df["email"].str.contains(search, case=False, na=False) |
-                df["organization"].str.contains(search, case=False, na=False)
-            )
-            filtered = df[mask]
+        st.markdown("---")
         
         # ========================================
         # LEADS TABLE
         # ========================================
+        sections.start("leads.table")
         st.subheader(f"All Leads ({len(filtered)})")
         
         if not filtered.empty:
             st.dataframe(filtered, use_container_width=True, hide_index=True)
             
-            # Export button
-            csv = filtered.to_csv(index=False)
-            st.download_button(
-                "📥 Export to CSV",
-                csv,
-                f"cora_leads_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                "text/csv",
-                use_container_width=False
-            )
+            # Export is generated only when the button is clicked, from the same filtered view
+            export_panel(filtered, "cora_leads", key="cora_export")
         else:
             st.info("No leads match your search criteria.")
 
@@ -432,6 +360,7 @@ elif st.session_state.selected_page == "Manage Tasks":
     # MANAGE TASKS PAGE (OPSI)
     # ========================================
     
+    sections.start("tasks.summary")
     # Scroll anchor at top
     st.markdown('<div id="manage-tasks-top"></div>', unsafe_allow_html=True)
     
@@ -440,324 +369,62 @@ elif st.session_state.selected_page == "Manage Tasks":
     
     opsi_df = load_opsi_data()
     
-    # Determine column names (handle trailing spaces)
-    status_col = "Status " if "Status " in opsi_df.columns else "Status"
-    priority_col = "Priority " if "Priority " in opsi_df.columns else "Priority"
-    task_id_col = "Task ID" if "Task ID" in opsi_df.columns else "OPSI ID"
-    task_title_col = "Task Title" if "Task Title" in opsi_df.columns else "Title"
-    
     # Metrics
+    metrics = get_task_metrics(opsi_df)
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        pending = len(opsi_df[opsi_df[status_col] == "New"]) if not opsi_df.empty else 0
-        st.metric("Pending", pending)
+        st.metric("Pending", metrics.with_status("New"))
     
     with col2:
-        in_progress = len(opsi_df[opsi_df[status_col] == "In Progress"]) if not opsi_df.empty else 0
-        st.metric("In Progress", in_progress)
+        st.metric("In Progress", metrics.with_status("In Progress"))
     
     with col3:
-        high = len(opsi_df[opsi_df[priority_col] == "High"]) if not opsi_df.empty else 0
-        st.metric("High Priority", high)
+        st.metric("High Priority", metrics.with_priority("High"))
     
     with col4:
-        st.metric("Total Tasks", len(opsi_df))
+        st.metric("Total Tasks", metrics.total)
     
     st.markdown("---")
     
+    # Each panel is a fragment: typing, selecting or submitting inside one
+    # reruns only that panel, not the sidebar, metrics and the other panels
+    
     # ========================================
     # CREATE TASK
     # ========================================
+    sections.start("tasks.create")
     
-    # Show success message if it exists in session state
-    if 'create_success_msg' in st.session_state:
-        st.success(st.session_state.create_success_msg)
-        del st.session_state.create_success_msg
-    
-    with st.expander("➕ Create New Task", expanded=False):
-        with st.form("task_form"):
-            
-            title = st.text_input("Task Title*")
-            
-            task_type = st.selectbox(
-                "Task Type*",
-                ["Select option", "RFP Submission", "Contract Renewal", "Audit", "Compliance Report", "Other"]
-            )
-            
-            assigned_to = st.text_input("Assigned To*", placeholder="Enter person name")
-            
-            deadline = st.date_input("Deadline Date*")
-            
-            priority = st.selectbox(
-                "Priority*",
-                ["Select option", "High", "Medium", "Low"]
-            )
-            
-            notes = st.text_area("Notes")
-            
-            submitted = st.form_submit_button("Create Task")
-            
-            if submitted:
-                errors = []
-                
-                if not title.strip():
-                    errors.append("Task title is required.")
-                if task_type == "Select option":
-                    errors.append("Task type is required.")
-                if priority == "Select option":
-                    errors.append("Priority is required.")
-                if not assigned_to.strip():
-                    errors.append("Assigned To is required.")
-                
-                if errors:
-                    for e in errors:
-                        st.error(e)
-                else:
-                    task_data = {
-                        "title": title,
-                        "taskType": task_type,
-                        "assignedTo": assigned_to,
-                        "deadline": str(deadline),
-                        "priority": priority,
-                        "notes": notes,
-                    }
-                    
-                    # Show processing message
-                    with st.spinner("Creating task..."):
-                        result = send_opsi_task(task_data)
-                    
-                    if result:
-                        # Store success message in session state before rerun
-                        st.session_state.create_success_msg = f"✅ Task '{title}' created successfully!"
-                        st.cache_data.clear()
-                        st.markdown("""
-                        <script>
-                            window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
-                        </script>
-                        """, unsafe_allow_html=True)
-                        st.rerun()
-                    else:
-                        st.error("❌ Failed to create task. Check that the OPSI webhook is running in n8n.")
+    task_create_panel()
     
     # ========================================
     # UPDATE TASK SECTION
     # ========================================
+    sections.start("tasks.update")
     
-    # Show success message if it exists in session state
-    if 'update_success_msg' in st.session_state:
-        st.success(st.session_state.update_success_msg)
-        del st.session_state.update_success_msg
+    task_update_panel()
     
-    # Keep expander open if search is active OR task is selected
-    is_expanded = (st.session_state.get('task_id_search', '') != '' or 
-                   st.session_state.get('selected_task_id') is not None)
+    # ========================================
+    # BULK UPDATE
+    # ========================================
+    sections.start("tasks.bulk")
     
-    with st.expander("✏️ Update Task", expanded=is_expanded):
-        st.markdown("**Select a task to update**")
-        
-        # Initialize session state for search
-        if 'task_id_search' not in st.session_state:
-            st.session_state.task_id_search = ""
-        
-        # Search Task ID field
-        task_id_search = st.text_input(
-            "🔍 Search Task ID:",
-            value=st.session_state.task_id_search,
-            placeholder="Enter Task ID to filter...",
-            key="task_id_search_input"
-        )
-        
-        # Update session state
-        st.session_state.task_id_search = task_id_search
-        
-        # Filter tasks based on search
-        if not opsi_df.empty and task_id_col in opsi_df.columns and task_title_col in opsi_df.columns:
-            filtered_opsi_df = opsi_df.copy()
-            
-            if task_id_search.strip():
-                filtered_opsi_df = opsi_df[
-                    opsi_df[task_id_col].str.contains(task_id_search, case=False, na=False)
-                ]
-            
-            if not filtered_opsi_df.empty:
-                task_options = {
-                    f"{row[task_id_col]} - {row[task_title_col]}": row[task_id_col] 
-                    for _, row in filtered_opsi_df.iterrows()
-                }
-                
-                # Initialize selected task in session state
-                if 'selected_task_id' not in st.session_state:
-                    st.session_state.selected_task_id = None
-                
-                # Get the current index for the selectbox
-                current_index = 0
-                task_ids = list(task_options.values())
-                if st.session_state.selected_task_id in task_ids:
-                    current_index = task_ids.index(st.session_state.selected_task_id)
-                
-                selected_task_label = st.selectbox(
-                    "Select Task:",
-                    options=list(task_options.keys()),
-                    index=current_index,
-                    key="task_selector_fixed"
-                )
-                
-                if selected_task_label:
-                    selected_task_id = task_options[selected_task_label]
-                    st.session_state.selected_task_id = selected_task_id
-                    
-                    # Get current task details
-                    task_row = opsi_df[opsi_df[task_id_col] == selected_task_id].iloc[0]
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        st.markdown("**Current Details:**")
-                        st.write(f"**Task Type:** {task_row.get('Task Type', 'N/A')}")
-                        st.write(f"**Title:** {task_row[task_title_col]}")
-                        st.write(f"**Status:** {task_row[status_col]}")
-                        st.write(f"**Priority:** {task_row[priority_col]}")
-                        st.write(f"**Assigned To:** {task_row.get('Assigned To', 'N/A')}")
-                        st.write(f"**Deadline:** {task_row.get('Deadline Date', 'N/A')}")
-                    
-                    with col2:
-                        st.markdown("**Update:**")
-                        
-                        # Initialize session state for form fields
-                        if f'form_title_{selected_task_id}' not in st.session_state:
-                            st.session_state[f'form_title_{selected_task_id}'] = task_row[task_title_col]
-                        if f'form_assigned_{selected_task_id}' not in st.session_state:
-                            st.session_state[f'form_assigned_{selected_task_id}'] = task_row.get('Assigned To', '')
-                        if f'form_deadline_{selected_task_id}' not in st.session_state:
-                            current_deadline = task_row.get('Deadline Date', '')
-                            if current_deadline and current_deadline != 'N/A':
-                                try:
-                                    import datetime as dt
-                                    st.session_state[f'form_deadline_{selected_task_id}'] = dt.datetime.strptime(str(current_deadline), '%Y-%m-%d').date()
-                                except:
-                                    st.session_state[f'form_deadline_{selected_task_id}'] = dt.date.today()
-                            else:
-                                import datetime as dt
-                                st.session_state[f'form_deadline_{selected_task_id}'] = dt.date.today()
-                        
-                        # Title input
-                        new_title = st.text_input(
-                            "Title:",
-                            value=st.session_state[f'form_title_{selected_task_id}'],
-                            key=f"new_title_{selected_task_id}"
-                        )
-                        
-                        # Assigned To input
-                        new_assigned_to = st.text_input(
-                            "Assigned To:",
-                            value=st.session_state[f'form_assigned_{selected_task_id}'],
-                            key=f"new_assigned_to_{selected_task_id}"
-                        )
-                        
-                        # Deadline input
-                        new_deadline = st.date_input(
-                            "Deadline:",
-                            value=st.session_state[f'form_deadline_{selected_task_id}'],
-                            key=f"new_deadline_{selected_task_id}"
-                        )
-                        
-                        # Status selection
-                        current_status_index = 0
-                        status_options = ["New", "In Progress", "Completed", "On Hold", "Cancelled"]
-                        if task_row[status_col] in status_options:
-                            current_status_index = status_options.index(task_row[status_col])
-                        
-                        new_status = st.selectbox(
-                            "Status:",
-                            options=status_options,
-                            index=current_status_index,
-                            key=f"new_status_select_{selected_task_id}"
-                        )
-                        
-                        # Priority selection
-                        current_priority_index = 1
-                        priority_options = ["High", "Medium", "Low"]
-                        if task_row[priority_col] in priority_options:
-                            current_priority_index = priority_options.index(task_row[priority_col])
-                        
-                        new_priority = st.selectbox(
-                            "Priority:",
-                            options=priority_options,
-                            index=current_priority_index,
-                            key=f"new_priority_select_{selected_task_id}"
-                        )
-                        
-                        update_notes = st.text_area(
-                            "Notes:", 
-                            value=task_row.get('Notes', ''), 
-                            key=f"update_notes_{selected_task_id}"
-                        )
-                        
-                        if st.button("💾 Update Task", type="primary", use_container_width=True, key=f"update_btn_{selected_task_id}"):
-                            update_data = {
-                                "taskId": selected_task_id,
-                                "taskType": task_row.get('Task Type', 'RFP Submission'),
-                                "title": new_title,
-                                "assignedTo": new_assigned_to,
-                                "deadline": str(new_deadline),
-                                "status": new_status,
-                                "priority": new_priority,
-                                "notes": update_notes
-                            }
-                            
-                            result = update_opsi_task(update_data)
-                            
-                            if result:
-                                # Store success message in session state before rerun
-                                st.session_state.update_success_msg = f"✅ Task {selected_task_id} updated successfully!"
-                                # Clear search and selection on successful update
-                                st.session_state.task_id_search = ""
-                                st.session_state.selected_task_id = None
-                                st.cache_data.clear()
-                                st.markdown("""
-                                <script>
-                                    window.parent.document.querySelector('[data-testid="stAppViewContainer"]').scrollTop = 0;
-                                </script>
-                                """, unsafe_allow_html=True)
-                                st.rerun()
-                            else:
-                                st.error("❌ Failed to update task")
-            else:
-                st.warning(f"⚠️ No tasks found matching '{task_id_search}'")
-        else:
-            st.warning("⚠️ Task ID or Title column not found in data")
+    bulk_update_panel()
     
     st.markdown("---")
     
     # ========================================
     # ACTIVE TASKS
     # ========================================
+    sections.start("tasks.active")
     st.subheader("Active Tasks")
     
-    if not opsi_df.empty:
-        # Add search/filter
-        search_task = st.text_input("🔍 Search tasks by title, assignee, or type...", key="task_search")
-        
-        filtered_tasks = opsi_df.copy()
-        if search_task:
-            assigned_col = "Assigned To" if "Assigned To" in opsi_df.columns else "AssignedTo"
-            task_type_col = "Task Type" if "Task Type" in opsi_df.columns else "TaskType"
-            
-            mask = (
-                opsi_df[task_title_col].str.contains(search_task, case=False, na=False) |
-                opsi_df.get(assigned_col, pd.Series(dtype='object')).str.contains(search_task, case=False, na=False) |
-                opsi_df.get(task_type_col, pd.Series(dtype='object')).str.contains(search_task, case=False, na=False)
-            )
-            filtered_tasks = opsi_df[mask]
-        
-        st.dataframe(filtered_tasks, hide_index=True, use_container_width=True)
-    else:
-        st.info("No tasks found. Create your first task above.")
+    active_tasks_panel()
 
 # ========================================
 # FOOTER
 # ========================================
+sections.start("footer")
 st.markdown("---")
 st.markdown(
     f"""
@@ -768,3 +435,4 @@ st.markdown(
     """,
     unsafe_allow_html=True
 )
+sections.stop()
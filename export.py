@@ -0,0 +1,83 @@
+import gzip
+import io
+from dataclasses import dataclass
+from typing import Callable
+
+# ========================================
+# CHUNKED FRAME EXPORT
+# ========================================
+# Exports are built only when a download is requested, a slice of rows at a
+# time, so neither the full frame is copied nor the whole file held as a str.
+
+EXPORT_CHUNK_ROWS = 50_000
+
+
+def iter_chunks(frame, rows=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield ``frame`` (or just the row positions in ``rows``) in slices of ``chunk_rows``"""
+    total = len(frame) if rows is None else len(rows)
+    if not total:
+        # Still yield an empty slice so the file gets its header/schema
+        yield frame.iloc[:0]
+        return
+    for start in range(0, total, chunk_rows):
+        stop = start + chunk_rows
+        yield frame.iloc[start:stop] if rows is None else frame.iloc[rows[start:stop]]
+
+
+def _write_csv(chunks, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    for number, chunk in enumerate(chunks):
+        chunk.to_csv(text, header=number == 0, index=False)
+    text.flush()
+    text.detach()
+
+
+def _write_csv_gzip(chunks, out):
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as compressed:
+        _write_csv(chunks, compressed)
+
+
+def _write_parquet(chunks, out):
+    # pyarrow only loads when someone actually exports Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            # Sheet columns can mix numbers and text; Arrow needs one type per column
+            mixed = {column: "string" for column in chunk.columns if chunk[column].dtype == object}
+            table = pa.Table.from_pandas(
+                chunk.astype(mixed) if mixed else chunk,
+                schema=writer.schema if writer else None,
+                preserve_index=False,
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(out, table.schema, compression="zstd")
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+    write: Callable
+
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("CSV", "csv", "text/csv", _write_csv),
+    "csv.gz": ExportFormat("CSV (gzip)", "csv.gz", "application/gzip", _write_csv_gzip),
+    "parquet": ExportFormat("Parquet", "parquet", "application/vnd.apache.parquet", _write_parquet),
+}
+
+
+def export_frame(frame, fmt, rows=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    """Write the selected rows of ``frame`` in ``fmt`` and return the file rewound"""
+    out = io.BytesIO()
+    EXPORT_FORMATS[fmt].write(iter_chunks(frame, rows, chunk_rows), out)
+    out.seek(0)
+    return out
@@ -0,0 +1,125 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# AGENT HEALTH PROBES
+# ========================================
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Outcome of one probe; ``ok`` is None while the answer is unknown"""
+    ok: Optional[bool]
+    detail: str = ""
+    checked_at: float = 0.0
+    elapsed: float = 0.0
+
+
+UNKNOWN = ProbeResult(None, "Checking…")
+
+# Unknown answers (e.g. a sheet not loaded yet) are re-checked sooner than the TTL
+UNKNOWN_TTL = 2.0
+
+
+class _Probe:
+    def __init__(self, name, check, ttl):
+        self.name = name
+        self.check = check
+        self.ttl = ttl
+        self.result = None
+
+    def stale(self, now):
+        if self.result is None:
+            return True
+        ttl = self.ttl if self.result.ok is not None else min(self.ttl, UNKNOWN_TTL)
+        return now - self.result.checked_at > ttl
+
+
+class HealthMonitor:
+    """Runs health probes concurrently in the background under one time budget.
+
+    ``results()`` never waits: it returns the cached outcomes and, when any is
+    older than its TTL, starts a single background round to refresh the stale
+    ones (stale-while-revalidate). A probe that misses the budget is reported
+    as failed for that round.
+    """
+
+    def __init__(self, budget=2.0, max_workers=8):
+        self.budget = budget
+        self.probes = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="health-probe")
+        self._round = None
+        self._round_lock = threading.Lock()
+
+    def register(self, name, check, ttl=30):
+        """Register ``check() -> (ok, detail)``; ``ok`` may be None for "unknown"."""
+        self.probes[name] = _Probe(name, check, ttl)
+
+    def results(self):
+        """Latest result per probe, refreshing stale ones in the background"""
+        now = time.time()
+        if any(probe.stale(now) for probe in self.probes.values()):
+            self._start_round()
+        return {name: probe.result or UNKNOWN for name, probe in self.probes.items()}
+
+    def _start_round(self):
+        with self._round_lock:
+            if self._round is not None and self._round.is_alive():
+                return
+            self._round = threading.Thread(target=self.run_round, name="health-round", daemon=True)
+            self._round.start()
+
+    def run_round(self):
+        """Run every stale probe at once and wait at most ``budget`` seconds for them"""
+        now = time.time()
+        futures = {
+            self._executor.submit(self._run, probe.check): probe
+            for probe in self.probes.values()
+            if probe.stale(now)
+        }
+        if not futures:
+            return
+        done, _ = wait(futures, timeout=self.budget)
+        for future, probe in futures.items():
+            if future in done:
+                probe.result = future.result()
+            else:
+                future.cancel()
+                probe.result = ProbeResult(False, f"No answer within {self.budget:g}s", time.time(), self.budget)
+
+    @staticmethod
+    def _run(check):
+        start = time.perf_counter()
+        try:
+            ok, detail = check()
+        except Exception as e:
+            logger.warning("Health probe failed: %s", e)
+            ok, detail = False, f"Error: {e}"
+        return ProbeResult(ok, detail, time.time(), time.perf_counter() - start)
+
+
+def summarize(results, names):
+    """Fold probe results into a badge status: Offline, Idle or Active"""
+    picked = [results[name] for name in names if name in results]
+    if any(result.ok is False for result in picked):
+        return "Offline"
+    if not picked or any(result.ok is None for result in picked):
+        return "Idle"
+    return "Active"
+
+
+def ago(seconds):
+    """Compact human age, e.g. "45s ago", "12m ago", "3h ago"."""
+    if seconds < 90:
+        return f"{seconds:.0f}s ago"
+    if seconds < 90 * 60:
+        return f"{seconds / 60:.0f}m ago"
+    if seconds < 36 * 3600:
+        return f"{seconds / 3600:.0f}h ago"
+    return f"{seconds / 86400:.0f}d ago"
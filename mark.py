@@ -1,5 +1,10 @@
 import streamlit as st
+from utils import get_agent_health
 
 def get_mark_status():
-    """Return MARK agent status"""
-    return "Active"
+    """Return MARK agent status (Active, Idle or Offline) from the latest health probes"""
+    return get_mark_health()[0]
+
+def get_mark_health():
+    """Return (MARK status, probe details) without waiting on any probe"""
+    return get_agent_health("MARK")
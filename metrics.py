@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+import pandas as pd
+
+# ========================================
+# DASHBOARD METRICS SNAPSHOTS
+# ========================================
+# Headline counts are computed once per data version with vectorised
+# value_counts and shared read-only by every rerun and session.
+
+
+def _frozen(mapping=None):
+    return MappingProxyType(dict(mapping or {}))
+
+
+def _counts(frame, column):
+    if column not in frame.columns:
+        return _frozen()
+    counts = frame[column].value_counts(sort=False)
+    return _frozen({str(key): int(n) for key, n in counts.items() if n})
+
+
+def _contains(frame, column, text):
+    if column not in frame.columns:
+        return 0
+    return int(frame[column].astype(str).str.contains(text, case=False, na=False, regex=False).sum())
+
+
+@dataclass(frozen=True)
+class LeadMetrics:
+    """Counts for one CORA snapshot version (and day, for "Today")"""
+    version: object = None
+    total: int = 0
+    today: int = 0
+    cities: int = 0
+    churches: int = 0
+    by_status: MappingProxyType = field(default_factory=_frozen)
+
+    def with_status(self, status):
+        return self.by_status.get(status, 0)
+
+
+@dataclass(frozen=True)
+class TaskMetrics:
+    """Counts for one OPSI snapshot version"""
+    version: object = None
+    total: int = 0
+    by_status: MappingProxyType = field(default_factory=_frozen)
+    by_priority: MappingProxyType = field(default_factory=_frozen)
+
+    def with_status(self, status):
+        return self.by_status.get(status, 0)
+
+    def with_priority(self, priority):
+        return self.by_priority.get(priority, 0)
+
+
+def compute_lead_metrics(df, today=None):
+    """Build LeadMetrics from a normalized CORA frame"""
+    today = pd.Timestamp(today or pd.Timestamp.now()).normalize()
+    leads_today = 0
+    # Unparsed (e.g. un-normalized) timestamps can't be compared to a date
+    if "timestamp" in df.columns and pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+        leads_today = int((df["timestamp"].dt.normalize() == today).sum())
+    return LeadMetrics(
+        version=df.attrs.get("snapshot_version"),
+        total=len(df),
+        today=leads_today,
+        cities=_contains(df, "organization", "City"),
+        churches=_contains(df, "organization", "Church"),
+        by_status=_counts(df, "Status"),
+    )
+
+
+def compute_task_metrics(df):
+    """Build TaskMetrics from a normalized OPSI frame"""
+    return TaskMetrics(
+        version=df.attrs.get("snapshot_version"),
+        total=len(df),
+        by_status=_counts(df, "Status"),
+        by_priority=_counts(df, "Priority"),
+    )
@@ -0,0 +1,114 @@
+"""Local stand-in for the n8n webhooks the dashboard calls.
+
+Run from the repo root:
+
+    python n8n_stub.py --port 5678
+
+then point the dashboard at it in .streamlit/secrets.toml:
+
+    N8N_WEBHOOK_BASE_URL = "http://127.0.0.1:5678/webhook"
+
+Every POST under /webhook/ answers {"success": true}; GET /healthz answers
+like n8n's health endpoint. --latency and --fail-rate simulate a slow or
+flaky instance.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ========================================
+# STUB SERVER
+# ========================================
+
+
+class N8nStub:
+    """Threaded HTTP/1.1 server that records every webhook request it receives"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, fail_rate=0.0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.requests = []
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/webhook"
+
+    def start(self):
+        """Serve on a background thread and return self"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name="n8n-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code, body):
+                data = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/healthz":
+                    self._reply(200, {"status": "ok"})
+                else:
+                    self._reply(404, {"message": "Not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b"null")
+                except ValueError:
+                    payload = None
+                with stub._lock:
+                    stub.requests.append({
+                        "path": self.path,
+                        "idempotency_key": self.headers.get("Idempotency-Key"),
+                        "payload": payload,
+                    })
+                if stub.latency:
+                    time.sleep(stub.latency)
+                if not self.path.startswith("/webhook/"):
+                    self._reply(404, {"message": "Webhook not registered"})
+                elif random.random() < stub.fail_rate:
+                    self._reply(503, {"message": "Workflow busy"})
+                else:
+                    self._reply(200, {"success": True, "message": f"{self.path} handled by stub"})
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to wait before each webhook reply")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of webhook calls answered with 503")
+    args = parser.parse_args()
+
+    stub = N8nStub(args.host, args.port, args.latency, args.fail_rate)
+    print(f"n8n stub listening on {stub.base_url}")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.stop()
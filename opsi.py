@@ -1,10 +1,15 @@
 import streamlit as st
 import pandas as pd
-from utils import load_opsi_data
+from query import filter_frame
+from utils import load_opsi_data, get_agent_health
 
 def get_opsi_status():
-    """Return OPSI agent status"""
-    return "Active"
+    """Return OPSI agent status (Active, Idle or Offline) from the latest health probes"""
+    return get_opsi_health()[0]
+
+def get_opsi_health():
+    """Return (OPSI status, probe details) without waiting on any probe"""
+    return get_agent_health("OPSI")
 
 def load_opsi_tasks():
     """Load OPSI tasks from Google Sheets"""
@@ -12,3 +17,12 @@ def load_opsi_tasks():
         return load_opsi_data()
     except:
         return pd.DataFrame()
+
+def get_opsi_column(name, default=None):
+    """One task column as a Series view, or ``default`` if the sheet lacks it"""
+    df = load_opsi_tasks()
+    return df[name] if name in df.columns else default
+
+def filter_opsi_tasks(df=None, limit=None, **isin):
+    """OPSI tasks filtered by ``query.filter_frame``, e.g. ``filter_opsi_tasks(Priority=["High"])``"""
+    return filter_frame(load_opsi_tasks() if df is None else df, limit=limit, **isin)
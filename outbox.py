@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# DURABLE WEBHOOK OUTBOX
+# ========================================
+
+OUTBOX_PATH = os.environ.get("DASHBOARD_OUTBOX_PATH", os.path.join(".cache", "outbox.sqlite3"))
+MAX_ATTEMPTS = 5
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+
+# pending -> sending -> sent, or back to pending with a retry delay; after
+# MAX_ATTEMPTS a write is dead-lettered as failed and stays there until retried
+PENDING, SENDING, SENT, FAILED = "pending", "sending", "sent", "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    order_key TEXT,
+    label TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    progress TEXT,
+    last_error TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outbox_status ON outbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS outbox_order_key ON outbox (order_key, id);
+"""
+
+# Oldest due write whose order key has no earlier write still in flight
+_NEXT_DUE = """
+SELECT * FROM outbox AS o
+WHERE o.status = 'pending' AND o.next_attempt_at <= ?
+  AND (o.order_key IS NULL OR NOT EXISTS (
+      SELECT 1 FROM outbox AS p
+      WHERE p.order_key = o.order_key AND p.id < o.id AND p.status IN ('pending', 'sending')
+  ))
+ORDER BY o.id
+LIMIT 1
+"""
+
+_handlers = {}
+_failure_listeners = []
+_schema_ready = False
+_schema_lock = threading.Lock()
+_wake = threading.Event()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _connect():
+    global _schema_ready
+    folder = os.path.dirname(OUTBOX_PATH)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_SCHEMA)
+                # Writes that were mid-flight when the process died get sent again
+                conn.execute("UPDATE outbox SET status = ? WHERE status = ?", (PENDING, SENDING))
+                _schema_ready = True
+    return conn
+
+
+def register_handler(kind, handler):
+    """Register ``handler(payload, progress) -> (ok, result_or_error)`` for a write kind.
+
+    ``progress(done, total)`` records how far a multi-part write has got.
+    """
+    _handlers[kind] = handler
+
+
+def enqueue(kind, payload, order_key=None, label=None):
+    """Persist a write and return its outbox ID; the worker sends it in the background"""
+    now = time.time()
+    conn = _connect()
+    try:
+        cursor = conn.execute(
+            "INSERT INTO outbox (kind, order_key, label, payload, status, next_attempt_at, created_at, updated_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, order_key, label, json.dumps(payload), PENDING, now, now, now),
+        )
+        item_id = cursor.lastrowid
+    finally:
+        conn.close()
+    ensure_worker()
+    _wake.set()
+    return item_id
+
+
+def retry(item_id):
+    """Re-queue a dead-lettered write with a fresh attempt budget; returns its new outbox ID.
+
+    The write moves to the tail as a new row, so it is ordered after any
+    writes with the same order key that were queued while it sat failed,
+    instead of going out under its old, earlier ID. Returns None if the
+    write isn't dead-lettered (e.g. a double-clicked Retry).
+    """
+    now = time.time()
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.execute(
+                "INSERT INTO outbox (kind, order_key, label, payload, status, next_attempt_at, created_at, updated_at)"
+                " SELECT kind, order_key, label, payload, ?, ?, ?, ? FROM outbox WHERE id = ? AND status = ?",
+                (PENDING, now, now, now, item_id, FAILED),
+            )
+            new_id = cursor.lastrowid if cursor.rowcount else None
+            if new_id is not None:
+                conn.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    ensure_worker()
+    _wake.set()
+    return new_id
+
+
+def recent(limit=20):
+    """Most recent writes, newest first, as plain dicts"""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT * FROM outbox ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+
+def counts():
+    """Number of writes in each state"""
+    conn = _connect()
+    try:
+        rows = conn.execute("SELECT status, COUNT(*) FROM outbox GROUP BY status").fetchall()
+    finally:
+        conn.close()
+    return {PENDING: 0, SENDING: 0, SENT: 0, FAILED: 0, **{status: n for status, n in rows}}
+
+
+def last_sent(kind):
+    """Unix time of the most recent successful write of a kind, or None"""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            "SELECT MAX(updated_at) FROM outbox WHERE kind = ? AND status = ?", (kind, SENT)
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0]
+
+
+def ensure_worker():
+    """Start the background drain thread if it isn't running"""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_drain_forever, name="outbox-worker", daemon=True)
+            _worker.start()
+
+
+def _drain_forever():
+    while True:
+        try:
+            while drain_one():
+                pass
+            timeout = _seconds_until_next_due()
+        except Exception as e:
+            logger.warning("Outbox worker error: %s", e)
+            timeout = BACKOFF_BASE
+        _wake.wait(timeout)
+        _wake.clear()
+
+
+def _seconds_until_next_due():
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT MIN(next_attempt_at) FROM outbox WHERE status = ?", (PENDING,)).fetchone()
+    finally:
+        conn.close()
+    return None if row[0] is None else max(row[0] - time.time(), 0.1)
+
+
+def drain_one():
+    """Send the next due write; returns False when nothing is due"""
+    conn = _connect()
+    try:
+        row = conn.execute(_NEXT_DUE, (time.time(),)).fetchone()
+        if row is None:
+            return False
+        claimed = conn.execute(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE id = ? AND status = ?",
+            (SENDING, time.time(), row["id"], PENDING),
+        ).rowcount
+        if not claimed:
+            return True
+
+        def progress(done, total):
+            conn.execute(
+                "UPDATE outbox SET progress = ?, updated_at = ? WHERE id = ?",
+                (f"{done}/{total}", time.time(), row["id"]),
+            )
+
+        handler = _handlers.get(row["kind"])
+        try:
+            if handler is None:
+                raise RuntimeError(f"No outbox handler for {row['kind']!r}")
+            ok, result = handler(json.loads(row["payload"]), progress)
+        except Exception as e:
+            ok, result = False, f"Error: {e}"
+
+        attempts = row["attempts"] + 1
+        now = time.time()
+        if ok:
+            conn.execute(
+                "UPDATE outbox SET status = ?, result = ?, last_error = NULL, updated_at = ? WHERE id = ?",
+                (SENT, json.dumps(result, default=str), now, row["id"]),
+            )
+        elif attempts >= MAX_ATTEMPTS:
+            conn.execute(
+                "UPDATE outbox SET status = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                (FAILED, str(result), now, row["id"]),
+            )
+            _notify_failed(row["kind"], row["id"])
+        else:
+            delay = min(BACKOFF_BASE ** attempts, BACKOFF_MAX)
+            conn.execute(
+                "UPDATE outbox SET status = ?, last_error = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                (PENDING, str(result), now + delay, now, row["id"]),
+            )
+        return True
+    finally:
+        conn.close()
+
+
+def on_failed(listener):
+    """Call ``listener(kind, item_id)`` whenever a write is dead-lettered"""
+    _failure_listeners.append(listener)
+
+
+def _notify_failed(kind, item_id):
+    for listener in _failure_listeners:
+        try:
+            listener(kind, item_id)
+        except Exception as e:
+            logger.warning("Outbox failure listener error: %s", e)
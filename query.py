@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from search import LeadSearchIndex
+
+# ========================================
+# ACTIVE TASKS QUERY LAYER
+# ========================================
+
+# Columns the "Search tasks" box matches against
+TASK_SEARCH_COLUMNS = ["Task Title", "Assigned To", "Task Type"]
+
+# Workflow order for the sortable label columns; other values sort after these, alphabetically
+TASK_SORT_ORDERS = {
+    "Priority": ["High", "Medium", "Low"],
+    "Status": ["New", "Pending", "In Progress", "On Hold", "Completed", "Cancelled"],
+}
+TASK_SORT_COLUMNS = ["Deadline Date", "Priority", "Status"]
+
+MISSING_LABELS = ["", "nan", "None", "N/A", "NaT"]
+
+
+@dataclass(frozen=True)
+class TaskPage:
+    """One page of a task query; ``frame`` holds only that page's rows"""
+    frame: pd.DataFrame
+    total: int
+    page: int
+    pages: int
+    start: int
+
+
+def _label_keys(series, order):
+    """Sort keys for a label column: workflow order first, then unknown labels alphabetically"""
+    values = series.astype(str).str.strip()
+    missing = values.isin(MISSING_LABELS).to_numpy()
+    codes, uniques = pd.factorize(values, sort=True)
+    known = {label: rank for rank, label in enumerate(order)}
+    ranks = np.array([known.get(label, len(order) + i) for i, label in enumerate(uniques)], dtype=np.int64)
+    return ranks[codes], missing
+
+
+def _date_keys(series):
+    if not pd.api.types.is_datetime64_any_dtype(series):
+        series = pd.to_datetime(series, errors="coerce")
+    missing = series.isna().to_numpy()
+    return np.where(missing, 0, series.to_numpy().view("int64")), missing
+
+
+class TaskTable:
+    """Filter, sort and page one OPSI snapshot without copying it.
+
+    Built once per data version: a search index over the text columns and,
+    for each sortable column, the row order ascending and descending (blank
+    cells last either way, ties in sheet order). A query picks the matching
+    rows, walks the precomputed order to sort them and slices out one page,
+    so its cost doesn't grow with the page size and only that page is rendered.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self.size = len(frame)
+        self._search = LeadSearchIndex(frame, TASK_SEARCH_COLUMNS)
+        self.sort_columns = [column for column in TASK_SORT_COLUMNS if column in frame.columns]
+
+        self._orders = {}
+        sheet_order = np.arange(self.size)
+        for column in self.sort_columns:
+            if column in TASK_SORT_ORDERS:
+                keys, missing = _label_keys(frame[column], TASK_SORT_ORDERS[column])
+            else:
+                keys, missing = _date_keys(frame[column])
+            # lexsort's last key is the primary one
+            self._orders[column, False] = np.lexsort((sheet_order, keys, missing))
+            self._orders[column, True] = np.lexsort((sheet_order, -keys, missing))
+
+    def matching(self, search="", filters=None, fuzzy=False):
+        """Row positions matching a search and ``filters`` ({column: allowed values}), in sheet order.
+
+        Returns None when nothing narrows the rows, meaning every row.
+        """
+        rows = self._search.search(search, fuzzy=fuzzy) if search.strip() else None
+        for column, values in (filters or {}).items():
+            if not values:
+                continue
+            if column not in self.frame.columns:
+                return np.array([], dtype=np.int64)
+            hits = self.frame[column].isin(values).to_numpy()
+            rows = np.flatnonzero(hits) if rows is None else rows[hits[rows]]
+        return rows
+
+    def query(self, search="", sort=None, descending=False, page=1, page_size=50, filters=None):
+        """Return one TaskPage of the rows matching ``search`` and ``filters``, sorted by ``sort``"""
+        rows = self.matching(search, filters)
+        if sort in self.sort_columns:
+            order = self._orders[sort, descending]
+            if rows is None:
+                rows = order
+            else:
+                member = np.zeros(self.size, dtype=bool)
+                member[rows] = True
+                rows = order[member[order]]
+
+        total = self.size if rows is None else len(rows)
+        pages = max((total - 1) // page_size + 1, 1)
+        page = min(max(int(page), 1), pages)
+        start = (page - 1) * page_size
+        stop = start + page_size
+        frame = self.frame.iloc[start:stop] if rows is None else self.frame.iloc[rows[start:stop]]
+        return TaskPage(frame, total, page, pages, start)
+
+
+# ========================================
+# FRAME FILTERS
+# ========================================
+
+def filter_frame(df, limit=None, **isin):
+    """Rows whose columns hold one of the given values, as a frame slice.
+
+    Scalars are treated as one-item lists; a column the frame lacks matches nothing.
+    """
+    mask = pd.Series(True, index=df.index)
+    for column, values in isin.items():
+        if column not in df.columns:
+            return df.iloc[0:0]
+        mask &= df[column].isin(values if isinstance(values, (list, tuple, set)) else [values])
+    filtered = df[mask]
+    return filtered.head(limit) if limit is not None else filtered
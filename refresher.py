@@ -0,0 +1,403 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Optional
+import pandas as pd
+from telemetry import cache_lookup, cache_miss
+
+logger = logging.getLogger(__name__)
+
+# Snapshot frames are shared by every session. With Copy-on-Write, a page's
+# shallow copy can be written to without touching them; pandas 3 always
+# works this way (and warns if the option is set), pandas 2 needs it enabled.
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
+# Optimistic patches are dropped if the sheet hasn't caught up within this many seconds
+PATCH_TTL = 300
+
+# ========================================
+# BACKGROUND DATASET REFRESHER
+# ========================================
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """An immutable, published version of a dataset.
+
+    ``frame`` is shared by every session, so callers must treat it as read-only.
+    """
+    name: str
+    frame: pd.DataFrame
+    version: int
+    fetched_at: datetime
+    error: Optional[str] = None
+    pending: int = 0
+
+
+def _cells_equal(series, value):
+    """Cells of ``series`` holding ``value``, compared as the column's dtype rather than as text.
+
+    A datetime column renders as text depending on its other cells (a date
+    shows a time once any cell has one), so dates and numbers are parsed and
+    compared as values; everything else compares as stripped text.
+    """
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return series.isna() | series.astype(str).str.strip().eq("")
+    if pd.api.types.is_datetime64_any_dtype(series):
+        parsed = pd.to_datetime(value, errors="coerce")
+        if pd.isna(parsed):
+            return pd.Series(False, index=series.index)
+        if series.dt.tz is not None:
+            parsed = parsed.tz_localize(series.dt.tz) if parsed.tzinfo is None else parsed.tz_convert(series.dt.tz)
+        elif parsed.tzinfo is not None:
+            # Same as the schema: offset-bearing cells are read as local wall time
+            from dateutil.tz import gettz
+            parsed = parsed.tz_convert(gettz()).tz_localize(None)
+        return series == parsed
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        number = pd.to_numeric(value, errors="coerce")
+        return series == number if pd.notna(number) else pd.Series(False, index=series.index)
+    return series.astype(str).str.strip() == str(value).strip()
+
+
+class RowPatch:
+    """An optimistic edit shown until the authoritative sheet reflects it.
+
+    With ``key_column`` set, the row whose key matches ``values[key_column]`` is
+    updated in place, or every row whose key is in ``keys`` when given (one
+    patch for a bulk edit); otherwise ``values`` is appended as a new row.
+    """
+
+    def __init__(self, values, key_column=None, ttl=PATCH_TTL, tag=None, keys=None):
+        self.values = dict(values)
+        self.key_column = key_column
+        if key_column is not None and keys is None:
+            keys = [self.values[key_column]]
+        self.keys = None if keys is None else {str(key) for key in keys}
+        self.tag = tag
+        self.expires = time.monotonic() + ttl
+
+    def expired(self):
+        return time.monotonic() > self.expires
+
+    def apply(self, frame):
+        frame = frame.copy()
+        if self.key_column is None:
+            row = {column: self.values.get(column, "") for column in frame.columns}
+            return pd.concat([frame, pd.DataFrame([row])], ignore_index=True)
+
+        if self.key_column not in frame.columns:
+            return frame
+        hits = frame[self.key_column].astype(str).isin(self.keys)
+        for column, value in self.values.items():
+            if column in frame.columns:
+                # Sheet columns are loosely typed; widen so any value can be written
+                frame[column] = frame[column].astype(object)
+                frame.loc[hits, column] = value
+        return frame
+
+    def confirmed(self, frame):
+        """True once authoritative rows carry all of the patched values (for every key, if keyed)"""
+        columns = [column for column in self.values if column in frame.columns]
+        if frame.empty or not columns:
+            return not columns
+        match = pd.Series(True, index=frame.index)
+        for column in columns:
+            match &= _cells_equal(frame[column], self.values[column]).to_numpy(dtype=bool)
+        if self.keys is None or self.key_column not in frame.columns:
+            return bool(match.any())
+        return self.keys <= set(frame.loc[match, self.key_column].astype(str))
+
+
+class Dataset:
+    """A named dataset, its fetch function and its adaptive refresh schedule"""
+
+    def __init__(self, name, fetch, interval, min_interval, max_interval, normalize=None):
+        self.name = name
+        self.fetch = fetch
+        self.normalize = normalize or (lambda frame: frame)
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.snapshot = None
+        self.raw_frame = None
+        self.source_frame = None
+        self.patches = []
+        self.next_due = 0.0
+        # ``fetch_lock`` serializes sheet reads; ``lock`` guards the state below and
+        # is only held briefly, so patches never wait on a slow fetch
+        self.fetch_lock = threading.Lock()
+        self.lock = threading.Lock()
+
+    def adapt(self, changed):
+        """Refresh more often while the sheet is changing and back off while it's quiet"""
+        if changed:
+            self.interval = max(self.min_interval, self.interval / 2)
+        else:
+            self.interval = min(self.max_interval, self.interval * 1.5)
+        self.next_due = time.monotonic() + self.interval
+
+    def apply_patches(self, frame, patches):
+        """Layer optimistic patches over a normalized frame and restore its dtypes"""
+        if not patches:
+            return frame
+        for patch in patches:
+            frame = patch.apply(frame)
+        return self.normalize(frame)
+
+
+class Refresher:
+    """One per process: owns every dataset and refreshes them on a background thread.
+
+    Sessions read the latest published snapshot without waiting. Only the very
+    first read of a dataset (no snapshot yet) fetches synchronously, and
+    concurrent first reads share that one fetch.
+    """
+
+    def __init__(self):
+        self.datasets = {}
+        self._wake = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def register(self, name, fetch, interval, min_interval=None, max_interval=None, normalize=None):
+        self.datasets[name] = Dataset(
+            name,
+            fetch,
+            interval,
+            min_interval or interval / 4,
+            max_interval or interval * 4,
+            normalize,
+        )
+
+    def get(self, name):
+        """Return the latest snapshot, fetching synchronously only if none exists yet"""
+        self._ensure_started()
+        dataset = self.datasets[name]
+        cache_lookup(f"snapshot.{name}")
+        snapshot = dataset.snapshot
+        if snapshot is not None:
+            return snapshot
+        with dataset.fetch_lock:
+            if dataset.snapshot is None:
+                cache_miss(f"snapshot.{name}")
+                self._refresh(dataset, raise_errors=True)
+                # Let the refresher thread pick up the new dataset's schedule
+                self._wake.set()
+            return dataset.snapshot
+
+    def get_many(self, names, timeouts=None):
+        """Load several datasets at once; cold ones are fetched concurrently.
+
+        Maps each name to its snapshot, to the exception its first fetch raised,
+        or to None if that fetch missed its timeout (``timeouts[name]``
+        seconds); a late fetch carries on in the background.
+        """
+        self._ensure_started()
+        timeouts = timeouts or {}
+        results, threads = {}, {}
+
+        def load(name):
+            try:
+                results[name] = self.get(name)
+            except Exception as e:
+                results[name] = e
+
+        for name in names:
+            if self.datasets[name].snapshot is not None:
+                cache_lookup(f"snapshot.{name}")
+                results[name] = self.datasets[name].snapshot
+            else:
+                threads[name] = threading.Thread(target=load, args=(name,), name=f"load-{name}", daemon=True)
+                threads[name].start()
+
+        start = time.monotonic()
+        for name, thread in threads.items():
+            timeout = timeouts.get(name)
+            thread.join(None if timeout is None else max(timeout - (time.monotonic() - start), 0))
+        return {name: results.get(name) for name in names}
+
+    def peek(self, name):
+        """Return the latest snapshot without ever fetching (None if not loaded yet)"""
+        dataset = self.datasets.get(name)
+        return dataset.snapshot if dataset is not None else None
+
+    def refresh(self, name, full=False):
+        """Re-fetch a dataset now, blocking until its new snapshot is published.
+
+        ``full`` asks the fetcher for a full read, which sees in-place edits
+        that an incremental one would miss.
+        """
+        dataset = self.datasets[name]
+        if not full and dataset.fetch_lock.locked():
+            # Another session or the refresher thread is reading the sheet right
+            # now; share that read instead of queueing a second one behind it
+            with dataset.fetch_lock:
+                if dataset.snapshot is not None:
+                    return dataset.snapshot
+        with dataset.fetch_lock:
+            self._refresh(dataset, raise_errors=dataset.snapshot is None, full=full)
+            self._wake.set()
+            return dataset.snapshot
+
+    def patch(self, name, patch):
+        """Publish an optimistic edit immediately; later refreshes reconcile it"""
+        dataset = self.datasets[name]
+        with dataset.lock:
+            dataset.patches.append(patch)
+            previous = dataset.snapshot
+            if previous is not None:
+                dataset.snapshot = replace(
+                    previous,
+                    frame=dataset.apply_patches(previous.frame, [patch]),
+                    version=previous.version + 1,
+                    pending=len(dataset.patches),
+                )
+        self.request_refresh(name)
+
+    def discard(self, name, tag):
+        """Drop the patches for a write that failed and republish without them"""
+        dataset = self.datasets[name]
+        with dataset.lock:
+            patches = [p for p in dataset.patches if p.tag != tag]
+            if len(patches) == len(dataset.patches):
+                return
+            dataset.patches = patches
+            previous = dataset.snapshot
+            if previous is not None and dataset.source_frame is not None:
+                frame = dataset.apply_patches(dataset.source_frame, patches)
+                dataset.snapshot = replace(
+                    previous, frame=frame, version=previous.version + 1, pending=len(patches)
+                )
+
+    def request_refresh(self, name):
+        """Make a dataset due immediately and wake the refresher thread"""
+        self.datasets[name].next_due = 0.0
+        self._wake.set()
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="dataset-refresher", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            now = time.monotonic()
+            for dataset in self.datasets.values():
+                # Datasets nobody has read yet are loaded on first use instead
+                if dataset.snapshot is not None and dataset.next_due <= now:
+                    with dataset.fetch_lock:
+                        self._refresh(dataset)
+            due = [d.next_due for d in self.datasets.values() if d.snapshot is not None]
+            timeout = max(min(due) - time.monotonic(), 0) if due else None
+            self._wake.wait(timeout)
+            self._wake.clear()
+
+    def _refresh(self, dataset, raise_errors=False, full=False):
+        """Fetch a dataset and publish the result; the caller holds ``dataset.fetch_lock``.
+
+        The fetch and normalization run without ``dataset.lock``, which is
+        only taken to reconcile patches and publish, so a write's ``patch()``
+        never waits for a sheet read (or its retries).
+        """
+        try:
+            # Pending patches are usually in-place edits, which need a full read to see
+            raw = dataset.fetch(full=full or bool(dataset.patches))
+            # Fetchers hand back the same frame object when nothing changed
+            changed = raw is not dataset.raw_frame
+            source = dataset.normalize(raw) if changed else dataset.source_frame
+        except Exception as e:
+            logger.warning("Refreshing %s failed: %s", dataset.name, e)
+            with dataset.lock:
+                dataset.adapt(changed=False)
+                previous = dataset.snapshot
+                if previous is None:
+                    if raise_errors:
+                        raise
+                    return
+                # Keep serving the last good data, but record why it's stale
+                dataset.snapshot = replace(previous, error=str(e))
+            return
+
+        with dataset.lock:
+            self._publish(dataset, raw, source, changed)
+
+    def _publish(self, dataset, raw, source, changed):
+        # Patches made during the fetch are already in the previous snapshot
+        previous = dataset.snapshot
+        if changed:
+            dataset.raw_frame = raw
+            dataset.source_frame = source
+        frame = source
+        patches = [p for p in dataset.patches if not p.expired() and not p.confirmed(frame)]
+        reconciled = len(patches) != len(dataset.patches)
+        dataset.patches = patches
+        dataset.adapt(changed)
+        if patches:
+            # Poll quickly until the sheet catches up with the optimistic edits
+            dataset.next_due = time.monotonic() + dataset.min_interval
+
+        if previous is None:
+            version = 1
+        else:
+            version = previous.version + 1 if changed or reconciled else previous.version
+        if changed or reconciled:
+            frame = dataset.apply_patches(frame, patches)
+        else:
+            frame = previous.frame
+        dataset.snapshot = Snapshot(
+            dataset.name, frame, version, datetime.now(timezone.utc), pending=len(patches)
+        )
+
+
+_refresher = Refresher()
+
+
+def register_dataset(name, fetch, interval, min_interval=None, max_interval=None, normalize=None):
+    """Register a dataset with the process-wide refresher.
+
+    ``normalize(frame)`` runs once per fetched version (and again after
+    optimistic patches), so every snapshot carries the canonical schema.
+    """
+    _refresher.register(name, fetch, interval, min_interval, max_interval, normalize)
+
+
+def get_snapshot(name):
+    """Return the latest published snapshot of a dataset"""
+    return _refresher.get(name)
+
+
+def get_snapshots(names, timeouts=None):
+    """Return the latest snapshots of several datasets, fetching cold ones in parallel"""
+    return _refresher.get_many(names, timeouts)
+
+
+def peek_snapshot(name):
+    """Return the latest snapshot of a dataset, or None, without triggering a fetch"""
+    return _refresher.peek(name)
+
+
+def request_refresh(name):
+    """Ask the refresher to re-fetch a dataset as soon as possible"""
+    _refresher.request_refresh(name)
+
+
+def refresh_dataset(name, full=False):
+    """Re-fetch one dataset now (``full`` re-reads every row) and return its new snapshot"""
+    return _refresher.refresh(name, full)
+
+
+def patch_dataset(name, patch):
+    """Apply an optimistic RowPatch to a dataset's published snapshot"""
+    _refresher.patch(name, patch)
+
+
+def discard_patches(name, tag):
+    """Remove the optimistic patches recorded for a failed write"""
+    _refresher.discard(name, tag)
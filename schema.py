@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+import pandas as pd
+
+# ========================================
+# LOAD-TIME SCHEMA NORMALIZATION
+# ========================================
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Canonical column names and dtypes for one sheet.
+
+    ``aliases`` maps each canonical header to the other headers older sheets
+    use for it. Low-cardinality columns become categoricals; ``dates`` and
+    ``timestamps`` are parsed to datetime64 (unparseable cells become NaT).
+    """
+    aliases: dict = field(default_factory=dict)
+    categorical: tuple = ()
+    dates: tuple = ()
+    timestamps: tuple = ()
+
+    def normalize(self, frame):
+        """Return a typed copy of ``frame``; normalizing twice is a no-op"""
+        frame = frame.rename(columns=self._canonical_names(frame.columns))
+
+        converted = {}
+        for column in self.categorical:
+            if column in frame.columns and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+                # Missing cells (e.g. from a patch or a shard without the column) read as blank,
+                # like empty sheet cells, rather than becoming a "nan" category
+                values = frame[column]
+                converted[column] = values.where(values.notna(), "").astype(str).astype("category")
+        for column in (*self.dates, *self.timestamps):
+            if column in frame.columns and not pd.api.types.is_datetime64_any_dtype(frame[column]):
+                converted[column] = _parse_datetimes(frame[column])
+        if converted:
+            frame = frame.assign(**converted)
+        return frame
+
+    def rename(self, frame):
+        """Return ``frame`` with its headers mapped onto the canonical names, without retyping"""
+        return frame.rename(columns=self._canonical_names(frame.columns))
+
+    def column_positions(self, header):
+        """0-based position of each canonical column in a raw sheet header row (first one wins)"""
+        renames = self._canonical_names(header)
+        positions = {}
+        for position, column in enumerate(header):
+            positions.setdefault(renames.get(column, column), position)
+        return positions
+
+    def _canonical_names(self, columns):
+        stripped = [str(column).strip() for column in columns]
+        present = set(stripped)
+        renames = {}
+        for column, name in zip(columns, stripped):
+            target = name
+            for canonical, alternatives in self.aliases.items():
+                # Never rename onto a column the sheet already has
+                if name in alternatives and canonical not in present:
+                    target = canonical
+                    break
+            if target != column:
+                renames[column] = target
+        return renames
+
+
+# A time followed by a UTC offset, e.g. "10:00:00+02:00" or "10:00Z"
+_UTC_OFFSET = r"\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?\s*(?:Z|[+-]\d{2}:?\d{2})$"
+
+
+def _parse_datetimes(series):
+    """Parse sheet date strings; ISO first (fast path), then any other format cell by cell.
+
+    Cells carrying a UTC offset (n8n writes those) are converted to local
+    time, so the column is always naive datetime64 even when its offsets
+    differ (e.g. across DST). Cells without one are kept as written.
+    """
+    # gettz() reads $TZ or /etc/localtime; a file zone converts vectorised, tzlocal() cell by cell
+    from dateutil.tz import gettz
+
+    values = series.astype(str).str.strip()
+    parsed = pd.to_datetime(values, format="ISO8601", errors="coerce", utc=True)
+    leftover = parsed.isna() & values.ne("") & values.ne("N/A")
+    if leftover.any():
+        parsed[leftover] = pd.to_datetime(values[leftover], format="mixed", errors="coerce", utc=True)
+    # utc=True read offset-less cells as UTC, so their UTC wall time is the one written
+    written = parsed.dt.tz_localize(None)
+    aware = values.str.contains(_UTC_OFFSET, regex=True)
+    if not aware.any():
+        return written
+    return written.mask(aware, parsed.dt.tz_convert(gettz()).dt.tz_localize(None))
+
+
+def format_date(value, missing="N/A"):
+    """Render a parsed date cell for display"""
+    return value.strftime("%Y-%m-%d") if pd.notna(value) else missing
+
+
+OPSI_SCHEMA = Schema(
+    aliases={
+        "Task ID": ["OPSI ID"],
+        "Task Title": ["Title"],
+        "Task Type": ["TaskType"],
+        "Assigned To": ["AssignedTo"],
+    },
+    categorical=("Status", "Priority", "Task Type"),
+    dates=("Deadline Date",),
+    timestamps=("Created At", "Updated At", "timestamp"),
+)
+
+CORA_SCHEMA = Schema(
+    categorical=("Status",),
+    timestamps=("timestamp",),
+)
@@ -0,0 +1,164 @@
+import math
+import numpy as np
+import pandas as pd
+
+# ========================================
+# LEAD SEARCH INDEX
+# ========================================
+
+FIELD_SEP = "\x1f"
+ROW_SEP = "\x1e"
+
+
+def resolve_columns(frame, names):
+    """Match wanted column names case- and whitespace-insensitively"""
+    lookup = {str(column).strip().lower(): column for column in frame.columns}
+    return [lookup[name.lower()] for name in names if name.lower() in lookup]
+
+
+class LeadSearchIndex:
+    """Trigram index over a few text columns of a frame.
+
+    Built once per data version with numpy, so no Python loop runs per row.
+    Queries of 3+ bytes intersect trigram posting lists and then confirm the
+    few surviving rows with a substring check. Shorter queries have no
+    trigram, so they are one vectorised substring scan. ``fuzzy=True``
+    ranks rows by how many of the query's trigrams they share, which
+    tolerates typos.
+    """
+
+    def __init__(self, frame, columns):
+        self.size = len(frame)
+        self.columns = resolve_columns(frame, columns)
+        if not self.columns or not self.size:
+            self.texts = np.array([], dtype=object)
+            self._codes = self._rows = np.array([], dtype=np.int64)
+            return
+
+        texts = frame[self.columns[0]].fillna("").astype(str).str.lower()
+        for column in self.columns[1:]:
+            texts = texts + FIELD_SEP + frame[column].fillna("").astype(str).str.lower()
+        texts = texts.reset_index(drop=True)
+        self.texts = texts.to_numpy(dtype=object)
+
+        # Byte trigrams over the UTF-8 text; a byte substring is a character substring
+        encoded = [text.encode("utf-8") for text in self.texts]
+        lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=self.size)
+        buf = np.frombuffer(ROW_SEP.encode().join(encoded), dtype=np.uint8).astype(np.int64)
+        row_of_byte = np.repeat(np.arange(self.size), lengths + 1)[: len(buf)]
+        if len(buf) >= 3:
+            codes = (buf[:-2] << 16) | (buf[1:-1] << 8) | buf[2:]
+            same_row = row_of_byte[:-2] == row_of_byte[2:]
+            keys = np.sort(codes[same_row] * self.size + row_of_byte[:-2][same_row])
+            keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+            self._codes, self._rows = keys // self.size, keys % self.size
+        else:
+            self._codes = self._rows = np.array([], dtype=np.int64)
+
+    def _posting(self, code):
+        lo, hi = np.searchsorted(self._codes, [code, code + 1])
+        return self._rows[lo:hi]
+
+    @staticmethod
+    def _trigrams(query):
+        b = np.frombuffer(query.encode("utf-8"), dtype=np.uint8).astype(np.int64)
+        return np.unique((b[:-2] << 16) | (b[1:-1] << 8) | b[2:])
+
+    def search(self, query, fuzzy=False):
+        """Return sorted row positions matching a query (all rows if it's blank)"""
+        query = query.strip().lower()
+        if not query:
+            return np.arange(self.size)
+        if len(query.encode("utf-8")) < 3:
+            return self._scan(query)
+        if fuzzy:
+            return self._fuzzy(query)
+
+        postings = sorted((self._posting(code) for code in self._trigrams(query)), key=len)
+        candidates = postings[0]
+        for posting in postings[1:]:
+            if not len(candidates):
+                break
+            candidates = np.intersect1d(candidates, posting, assume_unique=True)
+        if len(candidates) > 1000:
+            # Unselective query: confirm in one vectorised pass instead of a Python loop
+            hits = pd.Series(self.texts[candidates]).str.contains(query, regex=False).to_numpy()
+            return candidates[hits]
+        return np.array([row for row in candidates if query in self.texts[row]], dtype=np.int64)
+
+    def _scan(self, query):
+        hits = pd.Series(self.texts, dtype=object).str.contains(query, regex=False).to_numpy(dtype=bool)
+        return np.flatnonzero(hits)
+
+    def _fuzzy(self, query, min_share=0.5):
+        grams = self._trigrams(query)
+        postings = [self._posting(code) for code in grams]
+        if not postings:
+            return np.array([], dtype=np.int64)
+        scores = np.bincount(np.concatenate(postings), minlength=self.size)
+        needed = max(1, math.ceil(min_share * len(grams)))
+        rows = np.flatnonzero(scores >= needed)
+        # Best matches first
+        return rows[np.argsort(-scores[rows], kind="stable")]
+
+
+def search_frame(frame, index, query, fuzzy=False):
+    """Rows of ``frame`` matching ``query`` via a prebuilt index (no copy when blank)"""
+    if not query.strip():
+        return frame
+    return frame.iloc[index.search(query, fuzzy=fuzzy)]
+
+
+# ========================================
+# OPSI TASK ID INDEX
+# ========================================
+
+class TaskIdIndex:
+    """Hash and sorted-prefix index over the Task IDs of one OPSI snapshot.
+
+    ``lookup`` is a dict hit. ``prefix`` is a binary search over lowercased
+    keys, which hold each full ID plus every suffix that starts after a
+    ``-``, ``_`` or space, so "0042" finds "OPSI-0042". Selectbox labels are
+    built once, vectorised, at index time, and used as the options directly.
+    """
+
+    def __init__(self, frame, id_column, title_column):
+        ids = frame[id_column].fillna("").astype(str).reset_index(drop=True)
+        titles = frame[title_column].fillna("").astype(str).reset_index(drop=True)
+        self.ids = ids.to_numpy(dtype=object)
+        self.labels = (ids + " - " + titles).to_numpy(dtype=object)
+        # First occurrence wins, matching the old ``df[df[id] == x].iloc[0]``
+        self._positions = dict(zip(reversed(self.ids), range(len(ids) - 1, -1, -1)))
+        self._label_positions = dict(zip(reversed(self.labels), range(len(ids) - 1, -1, -1)))
+
+        keys = ids.str.lower().str.findall(r"(?:^|(?<=[-_\s]))(?=(\S.*))").explode().dropna()
+        order = np.argsort(keys.to_numpy(dtype=str), kind="stable")
+        self._keys = keys.to_numpy(dtype=str)[order]
+        self._key_rows = keys.index.to_numpy()[order]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def lookup(self, task_id):
+        """Row position of a Task ID, or None"""
+        return self._positions.get(str(task_id))
+
+    def label_position(self, label):
+        """Row position of a selectbox label ("ID - Title"), or None"""
+        return self._label_positions.get(label)
+
+    def prefix(self, query):
+        """Sorted row positions whose Task ID (or an ID segment) starts with ``query``"""
+        query = query.strip().lower()
+        if not query:
+            return np.arange(len(self.ids))
+        lo, hi = np.searchsorted(self._keys, [query, query + "\U0010ffff"])
+        return np.unique(self._key_rows[lo:hi])
+
+    def option_index(self, positions, task_id):
+        """Where a Task ID sits in ``positions`` (as returned by ``prefix``), or None"""
+        position = self.lookup(task_id)
+        if position is None:
+            return None
+        found = int(np.searchsorted(positions, position))
+        return found if found < len(positions) and positions[found] == position else None
@@ -0,0 +1,198 @@
+"""Quota-aware wrapper around a gspread client.
+
+    client = QuotaSheetsClient(gspread.authorize(credentials), reads_per_minute=60)
+    rows = client.open_by_key(sheet_id).sheet1.get_all_values()
+
+Every Sheets API call first takes a token from the read or write bucket,
+sized to the project's per-minute quota, so bursts are smoothed instead of
+hitting 429s. Calls that still get a 429 (or a 5xx, for reads) are retried
+with exponential backoff and full jitter. Identical reads that are in flight
+at the same time share one API request (single flight).
+"""
+import logging
+import random
+import threading
+import time
+from telemetry import span, cache_lookup, cache_miss
+
+logger = logging.getLogger(__name__)
+
+# Reads are safe to repeat; a write is only retried when Google rejected it outright
+READ_RETRY_STATUSES = (429, 500, 502, 503, 504)
+WRITE_RETRY_STATUSES = (429,)
+
+# Worksheet methods that cost one read or one write request
+READ_METHODS = frozenset({"get_all_values", "get_all_records", "get_values", "get", "batch_get", "row_values", "col_values"})
+WRITE_METHODS = frozenset({"append_row", "append_rows", "update", "batch_update", "update_cells", "clear"})
+
+# ========================================
+# RATE LIMITING
+# ========================================
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling ``per_minute`` tokens a minute, holding at most ``burst``.
+
+    ``acquire()`` reserves a token straight away (the balance may go
+    negative) and then sleeps until it is covered, so waiting callers are
+    served in arrival order.
+    """
+
+    def __init__(self, per_minute, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or max(per_minute // 6, 1))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it's available; returns the seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def _status(error):
+    """HTTP status of a gspread APIError (or anything carrying a response)"""
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+# ========================================
+# CLIENT
+# ========================================
+
+
+class QuotaSheetsClient:
+    """Throttles, retries and coalesces the Sheets calls the dashboard makes.
+
+    Only ``open_by_key`` and the worksheet it leads to (``.sheet1``,
+    ``.worksheet(title)``, ``.get_worksheet(index)``) are wrapped; anything
+    else is passed through to the gspread objects untouched. Coalesced
+    results are shared between callers, who must not modify them.
+    """
+
+    def __init__(self, client, reads_per_minute=60, writes_per_minute=60, retries=5, backoff=1.0, max_backoff=32.0):
+        self.client = client
+        self.reads = TokenBucket(reads_per_minute)
+        self.writes = TokenBucket(writes_per_minute)
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+
+    def open_by_key(self, key):
+        spreadsheet = self.read(("open_by_key", key), self.client.open_by_key, key)
+        return _Spreadsheet(self, key, spreadsheet)
+
+    def read(self, flight_key, func, *args, **kwargs):
+        """Run a read, sharing the result with identical reads already in flight"""
+        with self._flights_lock:
+            flight = self._flights.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[flight_key] = _Flight()
+        cache_lookup("sheets.read")
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        cache_miss("sheets.read")
+        try:
+            flight.result = self._call(self.reads, READ_RETRY_STATUSES, func, *args, **kwargs)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                del self._flights[flight_key]
+            flight.done.set()
+
+    def write(self, func, *args, **kwargs):
+        return self._call(self.writes, WRITE_RETRY_STATUSES, func, *args, **kwargs)
+
+    def _call(self, bucket, retry_statuses, func, *args, **kwargs):
+        for attempt in range(self.retries + 1):
+            with span("sheets.throttle_wait"):
+                bucket.acquire()
+            try:
+                return func(*args, **kwargs)
+            except Exception as e:
+                status = _status(e)
+                if status not in retry_statuses or attempt == self.retries:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                logger.warning("Sheets API returned %s, retrying in %.1fs (attempt %d/%d)", status, delay, attempt + 1, self.retries)
+                with span("sheets.retry_backoff"):
+                    time.sleep(delay)
+
+
+class _Spreadsheet:
+    def __init__(self, quota, key, spreadsheet):
+        self._quota = quota
+        self._key = key
+        self._spreadsheet = spreadsheet
+
+    @property
+    def sheet1(self):
+        worksheet = self._quota.read((self._key, "sheet1"), lambda: self._spreadsheet.sheet1)
+        return _Worksheet(self._quota, self._key, worksheet)
+
+    def get_worksheet(self, index):
+        worksheet = self._quota.read((self._key, "get_worksheet", index), self._spreadsheet.get_worksheet, index)
+        return _Worksheet(self._quota, self._key, worksheet)
+
+    def worksheet(self, title):
+        worksheet = self._quota.read((self._key, "worksheet", title), self._spreadsheet.worksheet, title)
+        return _Worksheet(self._quota, self._key, worksheet)
+
+    def __getattr__(self, name):
+        return getattr(self._spreadsheet, name)
+
+
+class _Worksheet:
+    def __init__(self, quota, key, worksheet):
+        self._quota = quota
+        self._key = key
+        self._worksheet = worksheet
+
+    def __getattr__(self, name):
+        attr = getattr(self._worksheet, name)
+        if name in READ_METHODS:
+            def read(*args, **kwargs):
+                flight_key = (self._key, getattr(self._worksheet, "id", None), name, repr(args), repr(sorted(kwargs.items())))
+                return self._quota.read(flight_key, attr, *args, **kwargs)
+            return read
+        if name in WRITE_METHODS:
+            def write(*args, **kwargs):
+                return self._quota.write(attr, *args, **kwargs)
+            return write
+        return attr
@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+# ========================================
+# ON-DISK SHEET SNAPSHOTS
+# ========================================
+
+# Snapshots survive restarts so the first render after a redeploy can skip Google Sheets
+SNAPSHOT_DIR = os.environ.get("DASHBOARD_SNAPSHOT_DIR", os.path.join(".cache", "snapshots"))
+KEEP_VERSIONS = 3
+
+_write_lock = threading.Lock()
+
+
+def _sheet_dir(sheet_id):
+    return os.path.join(SNAPSHOT_DIR, str(sheet_id))
+
+
+def save_snapshot(sheet_id, header, rows, fetched_at=None):
+    """Write raw sheet values as a Parquet file versioned by sheet ID and fetch time"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    fetched_at = fetched_at or datetime.now(timezone.utc)
+    # Positional column names; the real header (which may repeat or be blank) goes in metadata
+    columns = list(zip(*rows)) if rows else [()] * len(header)
+    table = pa.table(
+        {f"c{i}": pa.array(column, type=pa.string()) for i, column in enumerate(columns)},
+        metadata={
+            "header": json.dumps(header),
+            "sheet_id": str(sheet_id),
+            "fetched_at": fetched_at.isoformat(),
+        },
+    )
+
+    folder = _sheet_dir(sheet_id)
+    path = os.path.join(folder, f"{fetched_at.strftime('%Y%m%dT%H%M%S%f')}.parquet")
+    with _write_lock:
+        os.makedirs(folder, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table, tmp_path)
+        os.replace(tmp_path, path)
+        for old in _list_versions(sheet_id)[:-KEEP_VERSIONS]:
+            try:
+                os.remove(os.path.join(folder, old))
+            except OSError:
+                pass
+    return path
+
+
+def save_snapshot_async(sheet_id, header, rows):
+    """Save a snapshot on a background thread so the rerun isn't held up by disk I/O"""
+    thread = threading.Thread(
+        target=save_snapshot,
+        args=(sheet_id, list(header), list(rows)),
+        name=f"snapshot-{sheet_id}",
+        daemon=True,
+    )
+    thread.start()
+    return thread
+
+
+def _list_versions(sheet_id):
+    folder = _sheet_dir(sheet_id)
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name for name in os.listdir(folder) if name.endswith(".parquet"))
+
+
+def load_latest_snapshot(sheet_id):
+    """Return (header, rows, fetched_at) for the newest snapshot, or None"""
+    import pyarrow.parquet as pq
+
+    for name in reversed(_list_versions(sheet_id)):
+        try:
+            table = pq.read_table(os.path.join(_sheet_dir(sheet_id), name))
+        except Exception:
+            # A corrupt or half-written file shouldn't block the older versions
+            continue
+        metadata = table.schema.metadata or {}
+        header = json.loads(metadata.get(b"header", b"[]"))
+        fetched_at = datetime.fromisoformat(metadata.get(b"fetched_at", b"").decode() or "1970-01-01T00:00:00+00:00")
+        columns = [table.column(i).to_pylist() for i in range(table.num_columns)]
+        rows = [list(row) for row in zip(*columns)]
+        return header, rows, fetched_at
+    return None
@@ -0,0 +1,332 @@
+import hashlib
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+import pandas as pd
+from snapshots import load_latest_snapshot, save_snapshot_async
+
+logger = logging.getLogger(__name__)
+
+# ========================================
+# INCREMENTAL SHEET SYNC
+# ========================================
+
+# Every Nth sync re-reads the whole sheet so edits to existing rows are picked up
+FULL_SYNC_EVERY = 10
+
+
+def _column_letter(width):
+    """Return the A1 column letter for a 1-based column number"""
+    # gspread is imported on first use; importing it pulls in google-auth and requests
+    from gspread.utils import rowcol_to_a1
+    return rowcol_to_a1(1, max(width, 1))[:-1]
+
+
+def _pad(row, width):
+    """Pad or trim a raw row to the header width"""
+    row = list(row)
+    if len(row) < width:
+        row.extend([""] * (width - len(row)))
+    return row[:width]
+
+
+def _trim(header):
+    """Drop trailing blank header cells, which batch_get omits but get_all_values pads"""
+    header = list(header)
+    while header and header[-1] == "":
+        header.pop()
+    return header
+
+
+def _hash_rows(hasher, rows):
+    """Feed raw rows into a running hash so appends don't rehash the whole sheet"""
+    for row in rows:
+        hasher.update("\x1f".join(row).encode("utf-8"))
+        hasher.update(b"\x1e")
+    return hasher
+
+
+def _numericise_column(values):
+    """Column-wise equivalent of gspread's numericise_all, vectorised where possible"""
+    raw = pd.Series(values)
+    numeric = pd.to_numeric(raw, errors="coerce").notna().to_numpy()
+    if not numeric.any():
+        return raw
+    cells = raw.to_numpy(dtype=object)
+    if numeric.all():
+        # to_numeric only detects numbers; numpy's parser keeps full float precision
+        try:
+            return pd.Series(cells.astype("int64"))
+        except (ValueError, OverflowError):
+            return pd.Series(cells.astype("float64"))
+    # Mixed columns (e.g. phone numbers with blanks) keep per-cell types
+    from gspread.utils import numericise
+    cells[numeric] = [numericise(value) for value in cells[numeric]]
+    return pd.Series(cells)
+
+
+def rows_to_frame(header, rows):
+    """Turn raw string rows into the DataFrame get_all_records would have produced"""
+    if not header:
+        return pd.DataFrame()
+    columns = list(zip(*rows)) if rows else [()] * len(header)
+    return pd.DataFrame(
+        {i: _numericise_column(column) for i, column in enumerate(columns)}
+    ).set_axis(header, axis=1)
+
+
+class SheetSync:
+    """Keeps one worksheet mirrored in memory and fetches only appended rows.
+
+    The first sync (and every ``full_sync_every``-th one) reads the whole sheet.
+    In between, a single ``batch_get`` reads the header row plus everything from
+    the last known row onwards. The last known row acts as an anchor: if it no
+    longer matches, or the header changed, rows were edited, inserted or deleted
+    and we fall back to a full read.
+    """
+
+    def __init__(self, key, full_sync_every=FULL_SYNC_EVERY):
+        self.key = key
+        self.full_sync_every = full_sync_every
+        self.header = []
+        self.rows = []
+        self.digest = None
+        self._hasher = hashlib.sha1()
+        self.frame = pd.DataFrame()
+        self.version = 0
+        self.fetched_at = None
+        self.last_mode = None
+        self.last_fetched_rows = 0
+        self._syncs_since_full = 0
+        self._worksheet = None
+        self._warm_checked = False
+        self._lock = threading.Lock()
+
+    def sync(self, open_worksheet):
+        """Bring the mirror up to date; returns True if the data changed"""
+        with self._lock:
+            if self._worksheet is None:
+                self._worksheet = open_worksheet()
+            if not self.header or self._syncs_since_full >= self.full_sync_every:
+                changed = self._full_sync()
+            else:
+                changed = self._delta_sync()
+            self.fetched_at = datetime.now(timezone.utc)
+            return changed
+
+    def warm_start(self):
+        """Seed an empty mirror from the newest on-disk snapshot; True if seeded"""
+        with self._lock:
+            if self.version or self._warm_checked:
+                return False
+            self._warm_checked = True
+            snapshot = load_latest_snapshot(self.key)
+            if snapshot is None:
+                return False
+            header, rows, fetched_at = snapshot
+            self.header = header
+            self.rows = rows
+            self._hasher = _hash_rows(hashlib.sha1(), rows)
+            self.digest = self._hasher.hexdigest()
+            self.frame = self._to_frame(rows)
+            self.fetched_at = fetched_at
+            self.last_mode = "snapshot"
+            self.version += 1
+            # The snapshot may predate in-place edits, so revalidate with a full read
+            self._syncs_since_full = self.full_sync_every
+            return True
+
+    def request_full_sync(self):
+        """Make the next sync re-read the whole sheet, e.g. after an in-place edit"""
+        self._syncs_since_full = self.full_sync_every
+
+    def _full_sync(self):
+        values = self._worksheet.get_all_values()
+        self._syncs_since_full = 0
+        self.last_mode = "full"
+        self.last_fetched_rows = max(len(values) - 1, 0)
+
+        header = _trim(values[0]) if values else []
+        rows = [_pad(row, len(header)) for row in values[1:]]
+        hasher = _hash_rows(hashlib.sha1(), rows)
+        digest = hasher.hexdigest()
+        if header == self.header and digest == self.digest:
+            return False
+
+        self.header = header
+        self.rows = rows
+        self.digest = digest
+        self._hasher = hasher
+        self.frame = self._to_frame(rows)
+        self.version += 1
+        return True
+
+    def _delta_sync(self):
+        width = len(self.header)
+        known = len(self.rows)
+        # Sheet row 1 is the header, so the last known data row is sheet row ``known + 1``
+        start = known + 1 if known else 2
+        header_range, tail = self._worksheet.batch_get(
+            ["1:1", f"A{start}:{_column_letter(width)}"]
+        )
+        self._syncs_since_full += 1
+
+        header = _trim(header_range[0]) if header_range else []
+        if header != self.header:
+            return self._full_sync()
+
+        tail = [_pad(row, width) for row in tail]
+        if known:
+            if not tail or tail[0] != self.rows[-1]:
+                return self._full_sync()
+            tail = tail[1:]
+
+        self.last_mode = "delta"
+        self.last_fetched_rows = len(tail)
+        if not tail:
+            return False
+
+        new_frame = self._to_frame(tail)
+        if self.rows:
+            self.frame = pd.concat([self.frame, new_frame], ignore_index=True)
+        else:
+            self.frame = new_frame
+        self.rows.extend(tail)
+        self.digest = _hash_rows(self._hasher, tail).hexdigest()
+        self.version += 1
+        return True
+
+    def _to_frame(self, rows):
+        """Build a DataFrame the same way get_all_records would"""
+        return rows_to_frame(self.header, rows)
+
+
+_syncs = {}
+_syncs_lock = threading.Lock()
+
+
+def get_sheet_sync(key):
+    """Return the process-wide SheetSync for a sheet key"""
+    with _syncs_lock:
+        if key not in _syncs:
+            _syncs[key] = SheetSync(key)
+        return _syncs[key]
+
+
+def _revalidate(sheet_sync, open_worksheet, on_revalidated):
+    try:
+        if sheet_sync.sync(open_worksheet):
+            save_snapshot_async(sheet_sync.key, sheet_sync.header, sheet_sync.rows)
+            if on_revalidated:
+                on_revalidated()
+    except Exception as e:
+        logger.warning("Background revalidation of %s failed: %s", sheet_sync.key, e)
+
+
+def load_sheet(key, open_worksheet, on_revalidated=None):
+    """Return a sheet's DataFrame, serving a cold process from the on-disk snapshot.
+
+    After a warm start the sheet is revalidated on a background thread, and
+    ``on_revalidated`` is called if the live data turned out to differ.
+    """
+    sheet_sync = get_sheet_sync(key)
+    if sheet_sync.warm_start():
+        frame = sheet_sync.frame
+        threading.Thread(
+            target=_revalidate,
+            args=(sheet_sync, open_worksheet, on_revalidated),
+            name=f"revalidate-{key}",
+            daemon=True,
+        ).start()
+        return frame
+    if sheet_sync.sync(open_worksheet):
+        save_snapshot_async(key, sheet_sync.header, sheet_sync.rows)
+    return sheet_sync.frame
+
+
+def request_full_sync(key):
+    """Flag a sheet for a full re-read on its next sync"""
+    get_sheet_sync(key).request_full_sync()
+
+# ========================================
+# SHARDED DATASETS
+# ========================================
+
+# Upper bound on shards read at once (each is one sheet sync)
+MAX_SHARD_WORKERS = 8
+
+
+@dataclass(frozen=True)
+class SheetShard:
+    """One tab holding part of a dataset; ``tab`` None means the spreadsheet's first tab"""
+    sheet_id: str
+    tab: Optional[str] = None
+
+    @property
+    def key(self):
+        """Sync and snapshot key: the sheet ID, plus a filesystem-safe tab name"""
+        if self.tab is None:
+            return self.sheet_id
+        return f"{self.sheet_id}.{re.sub(r'[^A-Za-z0-9_-]+', '_', self.tab)}"
+
+    def open(self, client):
+        spreadsheet = client.open_by_key(self.sheet_id)
+        return spreadsheet.sheet1 if self.tab is None else spreadsheet.worksheet(self.tab)
+
+
+def merge_shards(frames, key_column, rename=None):
+    """Stack shard frames in order, keeping the first row seen for each ``key_column`` value.
+
+    ``rename`` maps each shard's headers onto canonical names first, so shards
+    using older header spellings still line up. Rows with a blank key are kept.
+    Columns missing from some shards are filled with "", like an empty cell.
+    """
+    if rename:
+        frames = [rename(frame) for frame in frames]
+    frames = [frame for frame in frames if not frame.empty] or frames[:1]
+    merged = pd.concat(frames, ignore_index=True)
+    if any(len(frame.columns) != len(merged.columns) for frame in frames):
+        merged = merged.fillna("")
+    if key_column not in merged.columns:
+        return merged
+    keys = merged[key_column].astype(str).str.strip()
+    duplicated = keys.duplicated() & keys.ne("")
+    if duplicated.any():
+        logger.info("Dropped %d rows duplicated across shards on %s", int(duplicated.sum()), key_column)
+        merged = merged[~duplicated.to_numpy()].reset_index(drop=True)
+    return merged
+
+
+_merged = {}
+_merged_lock = threading.Lock()
+
+
+def load_shards(name, shards, open_shard, key_column, rename=None, on_revalidated=None):
+    """Load every shard of a dataset in parallel and merge them into one frame.
+
+    Each shard is its own sheet sync, so unchanged shards cost one small delta
+    read and hand back the same frame as before. The merge is only redone when
+    some shard's frame changed; otherwise the previous merged frame is returned
+    as is, which tells the refresher nothing changed.
+    """
+    if len(shards) == 1:
+        return load_sheet(shards[0].key, lambda: open_shard(shards[0]), on_revalidated)
+
+    def load(shard):
+        return load_sheet(shard.key, lambda: open_shard(shard), on_revalidated)
+
+    with ThreadPoolExecutor(max_workers=min(len(shards), MAX_SHARD_WORKERS), thread_name_prefix=f"shard-{name}") as pool:
+        frames = list(pool.map(load, shards))
+
+    with _merged_lock:
+        previous = _merged.get(name)
+        if previous is not None and len(previous[0]) == len(frames) and all(a is b for a, b in zip(previous[0], frames)):
+            return previous[1]
+    merged = merge_shards(frames, key_column, rename)
+    with _merged_lock:
+        _merged[name] = (frames, merged)
+    return merged
@@ -0,0 +1,214 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from schema import OPSI_SCHEMA
+from telemetry import timed
+
+# ========================================
+# OPSI WRITE BACKENDS
+# ========================================
+# Both backends take webhook-style payloads ({"taskId", "title", "status", ...})
+# and answer the same way, so callers don't care which one is configured:
+#   create(task, idempotency_key) -> (ok, response_or_error)
+#   update(updates, idempotency_key) -> ({Task ID: error} for failures, response)
+
+
+class N8nTaskWrites:
+    """Writes go through n8n, which updates the sheet and runs the workflow's side effects.
+
+    Updates go one task per call to the ``opsi-update-task`` webhook, up to
+    ``max_parallel`` calls at a time, unless ``batch_endpoint`` names a
+    workflow that takes ``{"updates": [...]}`` and applies a whole chunk in
+    one call.
+    """
+
+    name = "n8n"
+
+    def __init__(self, get_client, batch_endpoint=None, max_parallel=4):
+        self.get_client = get_client
+        self.batch_endpoint = batch_endpoint
+        self.max_parallel = max_parallel
+
+    @timed("webhook.opsi_create_task")
+    def create(self, task, idempotency_key):
+        result = self.get_client().post("opsi-create-task", task, idempotency_key=idempotency_key)
+        if result.ok:
+            return True, result.data if result.data is not None else {"success": True, "message": "Task created successfully"}
+        return False, result.error
+
+    def update(self, updates, idempotency_key):
+        if self.batch_endpoint:
+            return self._update_batch(updates, idempotency_key)
+        # Updates to one task stay in order on one worker; different tasks go out in parallel
+        by_task = {}
+        for number, update in enumerate(updates, start=1):
+            by_task.setdefault(str(update.get("taskId")), []).append((number, update))
+        outcomes = {}
+
+        def send(group):
+            for number, update in group:
+                outcomes[number] = self._update_one(update, f"{idempotency_key}-{number}")
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_parallel, len(by_task)))) as pool:
+            list(pool.map(send, by_task.values()))
+
+        failed, responses = {}, []
+        for number, update in enumerate(updates, start=1):
+            ok, data = outcomes[number]
+            if ok:
+                responses.append(data)
+            else:
+                failed[str(update.get("taskId"))] = data
+        return failed, {"results": responses} if responses else None
+
+    @timed("webhook.opsi_update_task")
+    def _update_one(self, update, idempotency_key):
+        result = self.get_client().post("opsi-update-task", update, idempotency_key=idempotency_key)
+        if result.ok:
+            return True, result.data if result.data is not None else {"success": True, "message": "Task updated successfully"}
+        return False, result.error
+
+    @timed("webhook.opsi_update_tasks")
+    def _update_batch(self, updates, idempotency_key):
+        payload = {"updates": updates, "idempotency_key": idempotency_key}
+        result = self.get_client().post(self.batch_endpoint, payload, idempotency_key=idempotency_key)
+        if not result.ok:
+            return {str(update.get("taskId")): result.error for update in updates}, None
+        # n8n may report an outcome per task; tasks it doesn't mention count as updated
+        reported = result.data.get("results", []) if isinstance(result.data, dict) else []
+        failed = {
+            str(entry.get("taskId")): entry.get("error") or entry.get("message") or "Rejected by OPSI"
+            for entry in reported
+            if isinstance(entry, dict) and entry.get("success") is False
+        }
+        return failed, result.data
+
+
+def _cell(value):
+    return "" if value is None else value
+
+
+class SheetsTaskWrites:
+    """Writes go straight to the OPSI worksheets through gspread, skipping the n8n hop.
+
+    ``open_worksheets()`` returns the OPSI shards, the one new tasks go to
+    first. Every write reads each shard's header and Task ID column (two
+    small reads) and indexes Task ID -> sheet row, so rows are found even
+    after rows were inserted or deleted elsewhere. Creates are one
+    ``append_rows`` to the first shard and a batch of updates is one
+    ``batch_update`` per shard touched. New tasks get a Task ID derived from
+    the idempotency key, so a retried create finds its row and doesn't append
+    it twice; an existing row only counts as that create if its title matches
+    too. ``notify(event, payload, idempotency_key)`` is called after
+    each write so n8n can still run its side effects (emails, Slack).
+    """
+
+    name = "sheets"
+
+    # Hex characters of the idempotency key in a new Task ID (64 bits)
+    id_length = 16
+
+    def __init__(self, open_worksheets, row_values, notify=None, schema=OPSI_SCHEMA, key_column="Task ID",
+                 id_prefix="OPSI-", title_column="Task Title"):
+        self.open_worksheets = open_worksheets
+        self.row_values = row_values
+        self.notify = notify
+        self.schema = schema
+        self.key_column = key_column
+        self.id_prefix = id_prefix
+        self.title_column = title_column
+
+    def _layout(self, worksheet):
+        """Header width, canonical column positions and the Task ID -> sheet row index"""
+        header = worksheet.row_values(1)
+        positions = self.schema.column_positions(header)
+        if self.key_column not in positions:
+            raise RuntimeError(f"OPSI sheet has no {self.key_column!r} column")
+        ids = worksheet.col_values(positions[self.key_column] + 1)[1:]
+        index = {}
+        for row_number, task_id in enumerate(ids, start=2):
+            # First occurrence wins, like the dashboard's Task ID index
+            index.setdefault(str(task_id).strip(), row_number)
+        return len(header), positions, index
+
+    def _layouts(self):
+        """(worksheet, layout) per shard and the Task ID -> (shard, sheet row) index across them"""
+        layouts, located = [], {}
+        for worksheet in self.open_worksheets():
+            layout = self._layout(worksheet)
+            for task_id, row_number in layout[2].items():
+                # Earlier shards win, like the merged dataset
+                located.setdefault(task_id, (len(layouts), row_number))
+            layouts.append((worksheet, layout))
+        return layouts, located
+
+    def _stamp(self, values, *columns):
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        for column in columns:
+            values.setdefault(column, now)
+        return values
+
+    @timed("sheets.append_task")
+    def create(self, task, idempotency_key):
+        try:
+            layouts, located = self._layouts()
+            worksheet, (width, positions, _) = layouts[0]
+            task_id = f"{self.id_prefix}{idempotency_key[:self.id_length].upper()}"
+            if task_id in located:
+                shard, row_number = located[task_id]
+                if not self._same_task(layouts[shard], row_number, self.row_values(task)):
+                    return False, f"Task ID {task_id} already belongs to another task"
+            else:
+                values = self._stamp(self.row_values(task), "Created At", "Updated At")
+                values[self.key_column] = task_id
+                values.setdefault("Status", "New")
+                row = [""] * width
+                for column, value in values.items():
+                    if column in positions:
+                        row[positions[column]] = _cell(value)
+                worksheet.append_rows([row], value_input_option="USER_ENTERED")
+        except Exception as e:
+            return False, f"Sheets write failed: {e}"
+
+        created = {**task, "taskId": task_id}
+        if self.notify:
+            self.notify("task_created", {"task": created}, idempotency_key)
+        return True, {"success": True, "taskId": task_id, "message": "Task created successfully"}
+
+    def _same_task(self, layout, row_number, values):
+        """Whether an existing sheet row is the task a retried create wrote"""
+        worksheet, (_, positions, _) = layout
+        position = positions.get(self.title_column)
+        if position is None or self.title_column not in values:
+            return True
+        row = worksheet.row_values(row_number)
+        existing = row[position] if position < len(row) else ""
+        return str(existing).strip() == str(_cell(values[self.title_column])).strip()
+
+    @timed("sheets.update_tasks")
+    def update(self, updates, idempotency_key):
+        failed, written, cells = {}, [], {}
+        try:
+            from gspread.utils import rowcol_to_a1
+            layouts, located = self._layouts()
+            for update in updates:
+                values = self.row_values(update)
+                task_id = str(values.pop(self.key_column, "")).strip()
+                if task_id not in located:
+                    failed[task_id] = "Task ID not found in sheet"
+                    continue
+                shard, row_number = located[task_id]
+                positions = layouts[shard][1][1]
+                for column, value in self._stamp(values, "Updated At").items():
+                    if column in positions:
+                        cells.setdefault(shard, []).append(
+                            {"range": rowcol_to_a1(row_number, positions[column] + 1), "values": [[_cell(value)]]}
+                        )
+                written.append(update)
+            for shard, shard_cells in cells.items():
+                layouts[shard][0].batch_update(shard_cells, value_input_option="USER_ENTERED")
+        except Exception as e:
+            return {str(update.get("taskId")): f"Sheets write failed: {e}" for update in updates}, None
+
+        if written and self.notify:
+            self.notify("tasks_updated", {"updates": written}, idempotency_key)
+        return failed, {"updated": len(written), "cells": sum(len(shard_cells) for shard_cells in cells.values())}
@@ -0,0 +1,230 @@
+"""In-process timing spans and cache counters, served on a local endpoint.
+
+    from telemetry import span, timed, cache_lookup, cache_miss
+
+    with span("data.load_cora"):
+        ...
+
+Each span keeps a running count and sum plus its most recent durations,
+from which p50/p95/p99 are computed when the endpoint is scraped, so
+recording costs two clock reads and a deque append. ``serve(port)`` exposes
+everything at ``/metrics`` (Prometheus text format) and ``/metrics.json``.
+"""
+import functools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Recent durations kept per span for the quantiles
+SPAN_SAMPLES = 1024
+QUANTILES = (0.50, 0.95, 0.99)
+
+# ========================================
+# SPANS AND COUNTERS
+# ========================================
+
+
+class _SpanStats:
+    __slots__ = ("count", "total", "max", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=SPAN_SAMPLES)
+
+
+class Registry:
+    """Thread-safe store for span durations and cache lookup/miss counts"""
+
+    def __init__(self):
+        self._spans = {}
+        self._lookups = {}
+        self._misses = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = _SpanStats()
+            stats.count += 1
+            stats.total += seconds
+            stats.max = max(stats.max, seconds)
+            stats.samples.append(seconds)
+
+    def cache_lookup(self, cache):
+        with self._lock:
+            self._lookups[cache] = self._lookups.get(cache, 0) + 1
+
+    def cache_miss(self, cache):
+        with self._lock:
+            self._misses[cache] = self._misses.get(cache, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._lookups.clear()
+            self._misses.clear()
+
+    def snapshot(self):
+        """Aggregated view: per-span count/sum/max/quantiles and per-cache hits/misses"""
+        with self._lock:
+            spans = {name: (s.count, s.total, s.max, list(s.samples)) for name, s in self._spans.items()}
+            lookups, misses = dict(self._lookups), dict(self._misses)
+
+        result = {"spans": {}, "caches": {}}
+        for name, (count, total, longest, samples) in sorted(spans.items()):
+            samples.sort()
+            entry = {"count": count, "sum": total, "max": longest}
+            for q in QUANTILES:
+                entry[f"p{q * 100:g}"] = samples[min(int(q * len(samples)), len(samples) - 1)]
+            result["spans"][name] = entry
+        for cache in sorted(set(lookups) | set(misses)):
+            missed = misses.get(cache, 0)
+            # A miss is counted by the cached body and a lookup by its caller
+            result["caches"][cache] = {"hits": max(lookups.get(cache, 0) - missed, 0), "misses": missed}
+        return result
+
+
+_registry = Registry()
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block (also when it raises) under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe(name, time.perf_counter() - start)
+
+
+def timed(name):
+    """Decorator form of ``span``"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _registry.observe(name, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class SectionTimer:
+    """Times consecutive sections of a top-level script without re-indenting it.
+
+    ``start(name)`` closes the running section and opens the next one;
+    ``stop()`` closes the last one. A rerun that leaves early (``st.rerun``,
+    ``st.stop``) simply doesn't record its unfinished section.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self._name = None
+        self._start = 0.0
+
+    def start(self, name):
+        now = time.perf_counter()
+        if self._name is not None:
+            _registry.observe(self._name, now - self._start)
+        self._name = f"{self.prefix}.{name}"
+        self._start = now
+
+    def stop(self):
+        if self._name is not None:
+            _registry.observe(self._name, time.perf_counter() - self._start)
+            self._name = None
+
+
+def cache_lookup(cache):
+    """Count a call to a cached accessor"""
+    _registry.cache_lookup(cache)
+
+
+def cache_miss(cache):
+    """Count a cached body actually running (the lookup missed)"""
+    _registry.cache_miss(cache)
+
+
+def get_metrics():
+    """Current aggregates, as served at /metrics.json"""
+    return _registry.snapshot()
+
+
+def reset_metrics():
+    _registry.reset()
+
+# ========================================
+# EXPOSITION
+# ========================================
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(metrics=None):
+    """Render metrics in the Prometheus text exposition format"""
+    metrics = metrics or get_metrics()
+    lines = [
+        "# HELP dashboard_span_seconds Duration of instrumented dashboard code paths.",
+        "# TYPE dashboard_span_seconds summary",
+    ]
+    for name, entry in metrics["spans"].items():
+        label = f'span="{_escape(name)}"'
+        for q in QUANTILES:
+            lines.append(f'dashboard_span_seconds{{{label},quantile="{q:g}"}} {entry[f"p{q * 100:g}"]:.6f}')
+        lines.append(f"dashboard_span_seconds_sum{{{label}}} {entry['sum']:.6f}")
+        lines.append(f"dashboard_span_seconds_count{{{label}}} {entry['count']}")
+    lines += [
+        "# HELP dashboard_cache_requests_total Cache lookups by cache and result.",
+        "# TYPE dashboard_cache_requests_total counter",
+    ]
+    for cache, entry in metrics["caches"].items():
+        for result, key in (("hit", "hits"), ("miss", "misses")):
+            lines.append(f'dashboard_cache_requests_total{{cache="{_escape(cache)}",result="{result}"}} {entry[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def _handler():
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0].rstrip("/")
+            if path == "/metrics":
+                body, content_type = prometheus_text().encode(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, content_type = json.dumps(get_metrics()).encode(), "application/json"
+            else:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return Handler
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve /metrics and /metrics.json on a background thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), _handler())
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    logger.info("Metrics endpoint listening on http://%s:%s/metrics", *server.server_address[:2])
+    return server
@@ -0,0 +1,24 @@
+import pandas as pd
+from refresher import RowPatch
+from schema import OPSI_SCHEMA
+
+
+def tasks():
+    raw = pd.DataFrame({
+        "Task ID": ["OPSI-1", "OPSI-2"],
+        "Deadline Date": ["2026-11-01", "2026-11-02 14:30"],
+        "Status": ["New", ""],
+    })
+    return OPSI_SCHEMA.normalize(raw)
+
+
+def test_date_only_patches_are_confirmed_against_a_datetime_column():
+    frame = tasks()
+    assert RowPatch({"Task ID": "OPSI-1", "Deadline Date": "2026-11-01"}, key_column="Task ID").confirmed(frame)
+    assert not RowPatch({"Task ID": "OPSI-1", "Deadline Date": "2026-11-02"}, key_column="Task ID").confirmed(frame)
+
+
+def test_blank_patch_values_match_blank_cells():
+    frame = tasks()
+    assert RowPatch({"Task ID": "OPSI-2", "Status": ""}, key_column="Task ID").confirmed(frame)
+    assert not RowPatch({"Task ID": "OPSI-1", "Status": ""}, key_column="Task ID").confirmed(frame)
@@ -0,0 +1,78 @@
+import uuid
+import pandas as pd
+import pytest
+from benchmark import FakeWorksheet, make_tasks, sheet_values
+from search import LeadSearchIndex
+from sync import SheetSync, merge_shards
+
+
+@pytest.fixture
+def worksheet():
+    return FakeWorksheet(sheet_values(make_tasks(5)))
+
+
+def synced(worksheet):
+    sheet_sync = SheetSync(f"test-{uuid.uuid4().hex}")
+    assert sheet_sync.sync(lambda: worksheet)
+    assert sheet_sync.last_mode == "full"
+    return sheet_sync
+
+
+def test_first_sync_reads_the_whole_sheet(worksheet):
+    sheet_sync = synced(worksheet)
+    assert list(sheet_sync.frame.columns) == worksheet.values[0]
+    assert sheet_sync.frame["Task ID"].tolist() == [row[0] for row in worksheet.values[1:]]
+
+
+def test_unchanged_sheet_keeps_the_same_frame(worksheet):
+    sheet_sync = synced(worksheet)
+    frame, version = sheet_sync.frame, sheet_sync.version
+    assert not sheet_sync.sync(lambda: worksheet)
+    assert sheet_sync.last_mode == "delta"
+    assert sheet_sync.frame is frame and sheet_sync.version == version
+
+
+def test_appended_rows_are_fetched_as_a_delta(worksheet):
+    sheet_sync = synced(worksheet)
+    worksheet.values.extend(sheet_values(make_tasks(8))[6:])
+    assert sheet_sync.sync(lambda: worksheet)
+    assert sheet_sync.last_mode == "delta"
+    assert sheet_sync.last_fetched_rows == 3
+    assert sheet_sync.frame["Task ID"].tolist() == [f"OPSI-{i:06d}" for i in range(8)]
+
+
+@pytest.mark.parametrize("edit", ["last_row", "inserted_row", "deleted_row", "header"])
+def test_anchor_mismatch_falls_back_to_a_full_read(worksheet, edit):
+    sheet_sync = synced(worksheet)
+    if edit == "last_row":
+        worksheet.values[-1][1] = "Renamed"
+    elif edit == "inserted_row":
+        worksheet.values.insert(1, ["OPSI-X"] + [""] * (len(worksheet.values[0]) - 1))
+    elif edit == "deleted_row":
+        del worksheet.values[2]
+    else:
+        worksheet.values[0][1] = "Title"
+
+    assert sheet_sync.sync(lambda: worksheet)
+    assert sheet_sync.last_mode == "full"
+    assert sheet_sync.rows == [list(row) for row in worksheet.values[1:]]
+
+
+def test_requested_full_sync_sees_in_place_edits(worksheet):
+    sheet_sync = synced(worksheet)
+    worksheet.values[1][5] = "Completed"
+    sheet_sync.request_full_sync()
+    assert sheet_sync.sync(lambda: worksheet)
+    assert sheet_sync.last_mode == "full"
+    assert sheet_sync.frame.loc[0, "Status"] == "Completed"
+
+
+def test_merged_shards_with_different_columns_fill_blanks():
+    old = pd.DataFrame({"Task ID": ["A", "B"], "Task Title": ["one", "two"]})
+    new = pd.DataFrame({"Task ID": ["B", "C"], "Task Title": ["dup", "three"], "Owner": ["x", "y"]})
+    merged = merge_shards([old, new], "Task ID")
+
+    assert merged["Task ID"].tolist() == ["A", "B", "C"]
+    assert merged["Owner"].tolist() == ["", "", "y"]
+    assert not merged.isna().any(axis=None)
+    assert LeadSearchIndex(merged, ["Task Title", "Owner"]).search("y").tolist() == [2]
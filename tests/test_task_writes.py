@@ -0,0 +1,149 @@
+import time
+import pytest
+from benchmark import FakeWorksheet, make_tasks, sheet_values
+from n8n_stub import N8nStub
+from task_writes import N8nTaskWrites, SheetsTaskWrites
+from webhooks import WebhookClient
+
+PAYLOAD_COLUMNS = {"taskId": "Task ID", "title": "Task Title", "status": "Status", "priority": "Priority"}
+
+
+def row_values(payload):
+    return {column: payload[key] for key, column in PAYLOAD_COLUMNS.items() if key in payload}
+
+
+def cell(worksheet, task_id, column):
+    header = worksheet.values[0]
+    row = next(row for row in worksheet.values[1:] if row[0] == task_id)
+    return row[header.index(column)]
+
+
+@pytest.fixture
+def worksheet():
+    return FakeWorksheet(sheet_values(make_tasks(5)))
+
+
+@pytest.fixture
+def events():
+    return []
+
+
+@pytest.fixture
+def writer(worksheet, events):
+    return SheetsTaskWrites(lambda: [worksheet], row_values, notify=lambda *event: events.append(event))
+
+
+def test_update_finds_rows_by_task_id_after_rows_move(worksheet, writer):
+    # A row inserted above shifts every task down one sheet row
+    worksheet.values.insert(1, ["OPSI-NEW"] + [""] * (len(worksheet.values[0]) - 1))
+    failed, response = writer.update([{"taskId": "OPSI-000003", "status": "On Hold"}], "key-1")
+    assert failed == {}
+    assert response["updated"] == 1
+    assert cell(worksheet, "OPSI-000003", "Status") == "On Hold"
+    assert cell(worksheet, "OPSI-000002", "Status") == "Completed"
+
+
+def test_update_reports_unknown_task_ids(worksheet, writer, events):
+    failed, response = writer.update(
+        [{"taskId": "OPSI-000001", "priority": "Low"}, {"taskId": "OPSI-MISSING", "priority": "Low"}], "key-2"
+    )
+    assert failed == {"OPSI-MISSING": "Task ID not found in sheet"}
+    assert response["updated"] == 1
+    assert cell(worksheet, "OPSI-000001", "Priority") == "Low"
+    assert events == [("tasks_updated", {"updates": [{"taskId": "OPSI-000001", "priority": "Low"}]}, "key-2")]
+
+
+def test_create_appends_one_row_with_an_id_from_the_key(worksheet, writer, events):
+    ok, response = writer.create({"title": "Audit", "priority": "High"}, "abcdef0123456789")
+    assert ok
+    assert response["taskId"] == "OPSI-ABCDEF0123456789"
+    assert len(worksheet.values) == 7
+    assert cell(worksheet, "OPSI-ABCDEF0123456789", "Task Title") == "Audit"
+    assert cell(worksheet, "OPSI-ABCDEF0123456789", "Status") == "New"
+    assert events[0][0] == "task_created"
+
+
+def test_create_is_idempotent_per_key(worksheet, writer):
+    assert writer.create({"title": "Audit"}, "abcdef0123456789")[0]
+    ok, response = writer.create({"title": "Audit"}, "abcdef0123456789")
+    assert ok and response["taskId"] == "OPSI-ABCDEF0123456789"
+    assert len(worksheet.values) == 7
+
+
+def test_create_refuses_an_id_taken_by_another_task(worksheet, writer):
+    worksheet.values.append(["OPSI-ABCDEF0123456789"] + ["Someone else's task"] + [""] * (len(worksheet.values[0]) - 2))
+    ok, response = writer.create({"title": "Audit"}, "abcdef0123456789ffff")
+    assert not ok
+    assert "already belongs to another task" in response
+    assert len(worksheet.values) == 7
+
+
+def test_shards_update_where_the_task_lives_and_create_in_the_first(worksheet):
+    archive = FakeWorksheet([["OPSI ID", "Title", "Status"], ["OPSI-000001", "Old", "Completed"], ["OPSI-OLD", "Old", "Completed"]])
+    writer = SheetsTaskWrites(lambda: [worksheet, archive], row_values)
+
+    failed, _ = writer.update([{"taskId": "OPSI-OLD", "status": "New"}, {"taskId": "OPSI-000001", "status": "On Hold"}], "key-3")
+    assert failed == {}
+    assert archive.values[2] == ["OPSI-OLD", "Old", "New"]
+    # The first shard wins for an ID in both
+    assert cell(worksheet, "OPSI-000001", "Status") == "On Hold"
+    assert archive.values[1][2] == "Completed"
+
+    assert writer.create({"title": "Audit"}, "0123456789abcdef")[0]
+    assert len(worksheet.values) == 7 and len(archive.values) == 3
+
+
+def test_sheet_errors_fail_every_update_in_the_batch(writer, worksheet):
+    def broken(*args, **kwargs):
+        raise RuntimeError("quota exceeded")
+    worksheet.batch_update = broken
+    failed, response = writer.update([{"taskId": "OPSI-000001", "status": "New"}], "key-4")
+    assert response is None
+    assert failed == {"OPSI-000001": "Sheets write failed: quota exceeded"}
+
+
+@pytest.fixture
+def n8n():
+    stub = N8nStub().start()
+    yield stub, WebhookClient(base_url=stub.base_url, retries=0)
+    stub.stop()
+
+
+def test_n8n_updates_go_one_task_per_call_by_default(n8n):
+    stub, client = n8n
+    updates = [{"taskId": "OPSI-1", "status": "New"}, {"taskId": "OPSI-2", "status": "Completed"}]
+    failed, response = N8nTaskWrites(lambda: client).update(updates, "key-5")
+    assert failed == {}
+    assert len(response["results"]) == 2
+    assert sorted((r["path"], r["idempotency_key"], r["payload"]["taskId"]) for r in stub.requests) == [
+        ("/webhook/opsi-update-task", "key-5-1", "OPSI-1"),
+        ("/webhook/opsi-update-task", "key-5-2", "OPSI-2"),
+    ]
+
+
+def test_n8n_per_task_calls_run_in_parallel_but_keep_each_tasks_order():
+    stub = N8nStub(latency=0.2).start()
+    try:
+        client = WebhookClient(base_url=stub.base_url, retries=0)
+        updates = [{"taskId": f"OPSI-{n}", "status": "New"} for n in range(4)] + [{"taskId": "OPSI-0", "status": "Completed"}]
+        started = time.perf_counter()
+        failed, response = N8nTaskWrites(lambda: client, max_parallel=4).update(updates, "key-7")
+        elapsed = time.perf_counter() - started
+    finally:
+        stub.stop()
+    assert failed == {} and len(response["results"]) == 5
+    # Five calls at 0.2s each: two rounds in parallel rather than five in a row
+    assert elapsed < 0.8
+    assert [r["payload"]["status"] for r in stub.requests if r["payload"]["taskId"] == "OPSI-0"] == ["New", "Completed"]
+
+
+def test_n8n_batch_endpoint_sends_the_chunk_in_one_call(n8n):
+    stub, client = n8n
+    updates = [{"taskId": "OPSI-1", "status": "New"}, {"taskId": "OPSI-2", "status": "Completed"}]
+    failed, _ = N8nTaskWrites(lambda: client, batch_endpoint="opsi-update-tasks").update(updates, "key-6")
+    assert failed == {}
+    assert stub.requests == [{
+        "path": "/webhook/opsi-update-tasks",
+        "idempotency_key": "key-6",
+        "payload": {"updates": updates, "idempotency_key": "key-6"},
+    }]
@@ -0,0 +1,49 @@
+import pytest
+from n8n_stub import N8nStub
+from webhooks import WebhookClient
+
+
+@pytest.fixture
+def stub():
+    stub = N8nStub().start()
+    yield stub
+    stub.stop()
+
+
+def test_post_sends_json_with_the_idempotency_key(stub):
+    client = WebhookClient(base_url=stub.base_url, retries=0)
+    result = client.post("opsi-create-task", {"title": "Audit"}, idempotency_key="key-1")
+    assert result.ok and result.status == 200
+    assert result.data["success"] is True
+    assert stub.requests == [{"path": "/webhook/opsi-create-task", "idempotency_key": "key-1", "payload": {"title": "Audit"}}]
+
+
+def test_retries_reuse_the_same_idempotency_key(stub):
+    stub.fail_rate = 1.0
+    client = WebhookClient(base_url=stub.base_url, retries=2, backoff=0)
+    result = client.post("mark-approve-leads", {"approved_leads": ["L1"]}, idempotency_key="key-2")
+    assert not result.ok and result.status == 503
+    assert len(stub.requests) == 3
+    assert {request["idempotency_key"] for request in stub.requests} == {"key-2"}
+
+
+def test_calls_without_a_key_get_a_fresh_one_each(stub):
+    client = WebhookClient(base_url=stub.base_url, retries=0)
+    client.post("opsi-create-task", {})
+    client.post("opsi-create-task", {})
+    first, second = (request["idempotency_key"] for request in stub.requests)
+    assert first and second and first != second
+
+
+def test_unreachable_n8n_is_reported_not_raised():
+    stub = N8nStub()
+    base_url = stub.base_url
+    stub.server.server_close()
+    result = WebhookClient(base_url=base_url, retries=0).post("opsi-create-task", {})
+    assert not result.ok and result.status is None
+    assert "Connection failed" in result.error
+
+
+def test_ping_hits_the_instance_health_endpoint(stub):
+    result = WebhookClient(base_url=stub.base_url).ping()
+    assert result.ok and result.status == 200
@@ -1,17 +1,36 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
-import requests
-from datetime import datetime
+import hashlib
+import json
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from sync import load_shards, request_full_sync, SheetShard
+import outbox
+from search import LeadSearchIndex, TaskIdIndex
+from query import TaskTable
+from task_writes import N8nTaskWrites, SheetsTaskWrites
+from schema import CORA_SCHEMA, OPSI_SCHEMA
+from metrics import compute_lead_metrics, compute_task_metrics
+from health import HealthMonitor, summarize, ago
+from telemetry import timed, cache_lookup, cache_miss, serve as serve_metrics
+from refresher import register_dataset, get_snapshot, get_snapshots, peek_snapshot, request_refresh, refresh_dataset, patch_dataset, discard_patches, RowPatch
+
+logger = logging.getLogger(__name__)
 
 # ========================================
 # GOOGLE SHEETS CONNECTION
 # ========================================
 
 @st.cache_resource
+@timed("sheets.connect")
 def connect_to_sheets():
-    """Connect to Google Sheets using service account credentials"""
+    """Connect to Google Sheets using service account credentials, throttled to the API quota"""
+    # Imported here so the auth stack only loads when a sheet is first read
+    import gspread
+    from google.oauth2.service_account import Credentials
+    from sheets_client import QuotaSheetsClient
     try:
         credentials_dict = dict(st.secrets["google_credentials"])
         scope = [
@@ -19,152 +38,599 @@ def connect_to_sheets():
             'https://www.googleapis.com/auth/drive'
         ]
         credentials = Credentials.from_service_account_info(credentials_dict, scopes=scope)
-        client = gspread.authorize(credentials)
-        return client
+        # One client per process, so these buckets cover every session's calls
+        return QuotaSheetsClient(
+            gspread.authorize(credentials),
+            reads_per_minute=int(st.secrets.get("SHEETS_READS_PER_MINUTE", 60)),
+            writes_per_minute=int(st.secrets.get("SHEETS_WRITES_PER_MINUTE", 60)),
+            retries=int(st.secrets.get("SHEETS_RETRIES", 5)),
+            backoff=float(st.secrets.get("SHEETS_BACKOFF", 1.0)),
+        )
     except Exception as e:
         st.error(f"❌ Google Sheets connection error: {e}")
         return None
 
+# ========================================
+# N8N WEBHOOKS
+# ========================================
+
+@st.cache_resource
+def get_webhook_client():
+    """Shared pooled client for all n8n webhook calls"""
+    # requests/urllib3 load on the first webhook call or health probe, not at startup
+    from webhooks import WebhookClient, DEFAULT_BASE_URL
+    return WebhookClient(
+        base_url=st.secrets.get("N8N_WEBHOOK_BASE_URL", DEFAULT_BASE_URL),
+        retries=int(st.secrets.get("WEBHOOK_RETRIES", 3)),
+        backoff=float(st.secrets.get("WEBHOOK_BACKOFF", 0.5)),
+        health_url=st.secrets.get("N8N_HEALTH_URL"),
+    )
+
+# ========================================
+# SHARDED SHEETS
+# ========================================
+
+def _sheet_shards(setting, default_sheet_id):
+    """Tabs a dataset is spread over, listed under ``setting`` in secrets (default: one sheet's first tab).
+
+    Entries are a sheet ID, "sheet ID/tab name", or a table with ``sheet_id``
+    and/or ``tab``, where a missing sheet_id means ``default_sheet_id``. List
+    the tab new rows go to first: it wins when an ID appears in several shards.
+    """
+    entries = st.secrets.get(setting) or []
+    if isinstance(entries, str):
+        entries = [entries]
+    shards = []
+    for entry in entries:
+        if isinstance(entry, str):
+            sheet_id, _, tab = entry.partition("/")
+            shards.append(SheetShard(sheet_id.strip() or default_sheet_id, tab.strip() or None))
+        else:
+            shards.append(SheetShard(entry.get("sheet_id") or default_sheet_id, entry.get("tab") or None))
+    return shards or [SheetShard(default_sheet_id)]
+
+def _fetch_shards(name, shards, key_column, schema, full):
+    """Fetch and merge a dataset's shards (called by the background refresher)"""
+    client = connect_to_sheets()
+    if not client:
+        raise RuntimeError("Google Sheets client unavailable")
+    if full:
+        for shard in shards:
+            request_full_sync(shard.key)
+    # Each shard warm-starts from disk after a restart; otherwise only appended rows are fetched
+    return load_shards(
+        name,
+        shards,
+        lambda shard: shard.open(client),
+        key_column,
+        rename=schema.rename,
+        on_revalidated=lambda: request_refresh(name),
+    )
+
 # ========================================
 # CORA DATA FUNCTIONS
 # ========================================
 
-@st.cache_data(ttl=300)  # Cache for 5 minutes
+def _snapshot_frame(snapshot):
+    """A page's view of a published snapshot, tagged with its version for per-version caches"""
+    # Shallow copy: no data is copied, and Copy-on-Write (see refresher) turns a
+    # caller's in-place edit into a private copy instead of changing the shared snapshot
+    frame = snapshot.frame.copy(deep=False)
+    frame.attrs["snapshot_version"] = snapshot.version
+    return frame
+
+def get_cora_sheet_id():
+    """Return the CORA sheet ID from secrets, falling back to the shared sheet ID"""
+    return st.secrets.get("CORA_SHEET_ID", st.secrets.get("GOOGLE_SHEET_ID"))
+
+def get_cora_shards():
+    """CORA tabs from the CORA_SHARDS secret, or the first tab of the CORA sheet"""
+    return _sheet_shards("CORA_SHARDS", get_cora_sheet_id())
+
+def _fetch_cora_data(full=False):
+    """Fetch CORA leads from Google Sheets (called by the background refresher)"""
+    return _fetch_shards("cora", get_cora_shards(), "Lead ID", CORA_SCHEMA, full)
+
+register_dataset("cora", _fetch_cora_data, interval=300, min_interval=60, max_interval=900, normalize=CORA_SCHEMA.normalize)
+
+@timed("data.load_cora")
 def load_cora_data():
-    """Load CORA leads from Google Sheets"""
+    """Load CORA leads from the latest snapshot published by the background refresher"""
     try:
-        client = connect_to_sheets()
-        if client:
-            # Get CORA sheet ID from secrets or use default
-            sheet_id = st.secrets.get("CORA_SHEET_ID", st.secrets.get("GOOGLE_SHEET_ID"))
-            sheet = client.open_by_key(sheet_id).sheet1
-            data = sheet.get_all_records()
-            return pd.DataFrame(data)
-        return pd.DataFrame()
+        return _snapshot_frame(get_snapshot("cora"))
     except Exception as e:
         st.error(f"❌ Error loading CORA data: {e}")
         return pd.DataFrame()
 
-def send_approved_leads_to_mark(lead_ids):
-    """Send approved Lead IDs to MARK webhook"""
-    webhook_url = "https://apexxadams.app.n8n.cloud/webhook/mark-approve-leads"
-    
+# Columns the "Search leads" box matches against
+LEAD_SEARCH_COLUMNS = ["name", "email", "organization"]
+
+@st.cache_resource(max_entries=2)
+def _lead_search_index(version, _frame):
+    cache_miss("lead_search_index")
+    return LeadSearchIndex(_frame, LEAD_SEARCH_COLUMNS)
+
+def get_lead_search_index(df):
+    """Search index for a loaded CORA frame, shared by every rerun and session until the data changes"""
+    cache_lookup("lead_search_index")
+    return _lead_search_index(df.attrs.get("snapshot_version"), df)
+
+def _request_full_cora_sync():
+    """Make the next CORA fetch re-read every shard, so in-place edits to lead rows show up"""
+    for shard in get_cora_shards():
+        request_full_sync(shard.key)
+
+def refresh_cora_data():
+    """Re-read the whole CORA sheet now without touching the OPSI dataset"""
+    try:
+        refresh_dataset("cora", full=True)
+    except Exception as e:
+        st.error(f"❌ Error refreshing CORA data: {e}")
+
+def _mark_idempotency_key(lead_ids):
+    """Stable key for a chunk of Lead IDs, so retrying the same chunk can't double-send"""
+    return hashlib.sha256(",".join(sorted(lead_ids)).encode("utf-8")).hexdigest()[:32]
+
+@timed("webhook.mark_approve_leads")
+def _send_mark_chunk(lead_ids, timestamp):
+    """Send one chunk of approved Lead IDs to the MARK webhook"""
+    idempotency_key = _mark_idempotency_key(lead_ids)
     payload = {
         "approved_leads": lead_ids,
         "approved_by": "Dashboard User",
-        "timestamp": datetime.now().isoformat()
+        "timestamp": timestamp,
+        "idempotency_key": idempotency_key
     }
     
-    try:
-        # Increased timeout for processing multiple leads
-        response = requests.post(webhook_url, json=payload, timeout=30)
-        
-        # Check for successful response
-        if response.status_code == 200:
-            try:
-                # Try to parse JSON response from n8n
-                result = response.json()
-                return True, result
-            except:
-                # If no JSON, still consider it success
-                return True, {"message": "Leads approved successfully"}
-        else:
-            # Return error details
-            error_msg = f"HTTP {response.status_code}"
-            try:
-                error_detail = response.json()
-                error_msg = f"{error_msg}: {error_detail}"
-            except:
-                error_msg = f"{error_msg}: {response.text}"
-            return False, error_msg
-            
-    except requests.exceptions.Timeout:
-        return False, "Request timed out - workflow may still be processing"
-    except requests.exceptions.ConnectionError:
-        return False, "Connection failed - check webhook URL and n8n status"
-    except Exception as e:
-        return False, f"Error: {str(e)}"
+    result = get_webhook_client().post("mark-approve-leads", payload, idempotency_key=idempotency_key)
+    if result.ok:
+        # If no JSON, still consider it success
+        return True, result.data if result.data is not None else {"message": "Leads approved successfully"}
+    return False, result.error
+
+def send_approved_leads_to_mark(lead_ids, chunk_size=None, max_parallel=None, on_progress=None):
+    """Send approved Lead IDs to MARK webhook in concurrent chunks.
+
+    Returns ``(success, response)``. ``response`` has ``approved`` (Lead IDs
+    whose chunk succeeded), ``failed`` (Lead ID -> error) and ``results``
+    (the n8n response per chunk). ``on_progress(done, total)`` is called on
+    the calling thread as each chunk finishes, so it can update Streamlit
+    elements.
+    """
+    chunk_size = chunk_size or int(st.secrets.get("MARK_CHUNK_SIZE", 50))
+    max_parallel = max_parallel or int(st.secrets.get("MARK_MAX_PARALLEL", 4))
+    timestamp = datetime.now().isoformat()
+    
+    # Sorted so a retried approval produces the same chunks and idempotency keys
+    lead_ids = sorted(set(lead_ids))
+    chunks = [lead_ids[i:i + chunk_size] for i in range(0, len(lead_ids), chunk_size)]
+    response = {"approved": [], "failed": {}, "results": []}
+    if not chunks:
+        return False, response
+    
+    with ThreadPoolExecutor(max_workers=min(max_parallel, len(chunks))) as pool:
+        futures = {pool.submit(_send_mark_chunk, chunk, timestamp): chunk for chunk in chunks}
+        for done, future in enumerate(as_completed(futures), start=1):
+            chunk = futures[future]
+            success, result = future.result()
+            if success:
+                response["approved"].extend(chunk)
+                response["results"].append(result)
+            else:
+                response["failed"].update({lead_id: result for lead_id in chunk})
+            if on_progress:
+                on_progress(done, len(chunks))
+    
+    if response["approved"]:
+        # MARK edits lead rows in place, which only a full read of CORA picks up
+        _request_full_cora_sync()
+        request_refresh("cora")
+    return not response["failed"], response
 
 # ========================================
 # OPSI DATA FUNCTIONS
 # ========================================
 
-@st.cache_data(ttl=60)  # Cache for 1 minute
+def get_opsi_sheet_id():
+    """Return the OPSI sheet ID from secrets or the default"""
+    return st.secrets.get("OPSI_SHEET_ID", "1kt4z_zcfiX_Xx3jhahihWMB5LMrh0-GpmQDBxKjSl4A")
+
+def get_opsi_shards():
+    """OPSI tabs from the OPSI_SHARDS secret, or the first tab of the OPSI sheet"""
+    return _sheet_shards("OPSI_SHARDS", get_opsi_sheet_id())
+
+def _fetch_opsi_data(full=False):
+    """Fetch OPSI tasks from Google Sheets (called by the background refresher)"""
+    return _fetch_shards("opsi", get_opsi_shards(), "Task ID", OPSI_SCHEMA, full)
+
+register_dataset("opsi", _fetch_opsi_data, interval=60, min_interval=15, max_interval=300, normalize=OPSI_SCHEMA.normalize)
+
+@timed("data.load_opsi")
 def load_opsi_data():
-    """Load OPSI tasks from Google Sheets"""
+    """Load OPSI tasks from the latest snapshot published by the background refresher"""
     try:
-        client = connect_to_sheets()
-        if client:
-            # OPSI sheet ID
-            sheet_id = st.secrets.get("OPSI_SHEET_ID", "1kt4z_zcfiX_Xx3jhahihWMB5LMrh0-GpmQDBxKjSl4A")
-            sheet = client.open_by_key(sheet_id).sheet1
-            data = sheet.get_all_records()
-            return pd.DataFrame(data)
-        return pd.DataFrame()
+        return _snapshot_frame(get_snapshot("opsi"))
     except Exception as e:
         st.error(f"❌ Error loading OPSI data: {e}")
         return pd.DataFrame()
 
+@st.cache_resource(max_entries=2)
+def _task_id_index(version, _frame):
+    cache_miss("task_id_index")
+    return TaskIdIndex(_frame, "Task ID", "Task Title")
+
+def get_task_id_index(df):
+    """Task ID index for a loaded OPSI frame, shared by every rerun and session until the data changes"""
+    cache_lookup("task_id_index")
+    return _task_id_index(df.attrs.get("snapshot_version"), df)
+
+@st.cache_resource(max_entries=2)
+def _task_table(version, _frame):
+    cache_miss("task_table")
+    return TaskTable(_frame)
+
+def get_task_table(df):
+    """Filter/sort/page layer for a loaded OPSI frame, built once per data version"""
+    cache_lookup("task_table")
+    return _task_table(df.attrs.get("snapshot_version"), df)
+
+# Webhook payload keys and the OPSI sheet columns they land in
+OPSI_PAYLOAD_COLUMNS = {
+    "taskId": "Task ID",
+    "title": "Task Title",
+    "taskType": "Task Type",
+    "assignedTo": "Assigned To",
+    "deadline": "Deadline Date",
+    "status": "Status",
+    "priority": "Priority",
+    "notes": "Notes",
+}
+
+def _opsi_row_values(payload, extra=None):
+    """Map a webhook payload onto the normalized OPSI columns for an optimistic patch"""
+    values = dict(extra or {})
+    for key, column in OPSI_PAYLOAD_COLUMNS.items():
+        if key in payload:
+            values[column] = payload[key]
+    return values
+
+def _open_opsi_worksheets():
+    client = connect_to_sheets()
+    if not client:
+        raise RuntimeError("Google Sheets client unavailable")
+    return [shard.open(client) for shard in get_opsi_shards()]
+
+def _queue_task_event(event, data, idempotency_key):
+    """Queue a note to n8n about a write made straight to the sheet, so its side effects still run.
+
+    Opt-in: only sent when OPSI_EVENTS_WEBHOOK names the n8n workflow taking these events.
+    """
+    if not st.secrets.get("OPSI_EVENTS_WEBHOOK"):
+        return None
+    return outbox.enqueue(
+        "task_event",
+        {"event": event, "data": data, "idempotency_key": f"{idempotency_key}-{event}"},
+        label=f"Notify n8n: {event.replace('_', ' ')}"
+    )
+
+# OPSI_WRITE_BACKEND picks one; both take webhook payloads and answer the same way
+OPSI_WRITE_BACKENDS = {
+    # OPSI_BATCH_WEBHOOK opts in to a workflow taking whole chunks of updates per call;
+    # without it, OPSI_MAX_PARALLEL per-task calls run at once
+    "n8n": lambda: N8nTaskWrites(
+        get_webhook_client,
+        batch_endpoint=st.secrets.get("OPSI_BATCH_WEBHOOK") or None,
+        max_parallel=int(st.secrets.get("OPSI_MAX_PARALLEL", 4)),
+    ),
+    "sheets": lambda: SheetsTaskWrites(
+        _open_opsi_worksheets,
+        _opsi_row_values,
+        notify=_queue_task_event,
+        id_prefix=st.secrets.get("OPSI_TASK_ID_PREFIX", "OPSI-"),
+    ),
+}
+
+def get_opsi_writer():
+    """The configured OPSI write backend: "n8n" (default) or "sheets" for direct gspread writes"""
+    name = st.secrets.get("OPSI_WRITE_BACKEND", "n8n")
+    if name not in OPSI_WRITE_BACKENDS:
+        raise ValueError(f"Unknown OPSI_WRITE_BACKEND {name!r}; expected one of {', '.join(OPSI_WRITE_BACKENDS)}")
+    return OPSI_WRITE_BACKENDS[name]()
+
 def send_opsi_task(task_data):
-    """Send new OPSI task to n8n webhook"""
-    # UPDATED: Correct webhook URL for apexxadams
-    webhook_url = "https://apexxadams.app.n8n.cloud/webhook/opsi-create-task"
+    """Create a new OPSI task through the configured write backend"""
+    ok, result = get_opsi_writer().create(task_data, uuid.uuid4().hex)
     
-    try:
-        response = requests.post(webhook_url, json=task_data, timeout=30)
-        
-        if response.status_code == 200:
-            try:
-                return response.json()
-            except:
-                return {"success": True, "message": "Task created successfully"}
-        else:
-            error_msg = f"HTTP {response.status_code}"
-            try:
-                error_detail = response.json()
-                st.error(f"❌ OPSI webhook error: {error_msg} - {error_detail}")
-            except:
-                st.error(f"❌ OPSI webhook error: {error_msg}")
-            return None
-            
-    except requests.exceptions.Timeout:
-        st.error("❌ Request timed out - task may still be processing")
-        return None
-    except requests.exceptions.ConnectionError:
-        st.error("❌ Connection failed - check webhook URL and n8n status")
-        return None
-    except Exception as e:
-        st.error(f"❌ Error sending OPSI task: {e}")
-        return None
+    if ok:
+        # Show the new task straight away; the next refresh reconciles it
+        patch_dataset("opsi", RowPatch(_opsi_row_values(task_data, {"Status": "New"})))
+        return result
+    
+    st.error(f"❌ OPSI write error: {result}")
+    return None
+
+def update_opsi_tasks(updates, chunk_size=None, idempotency_key=None, on_progress=None):
+    """Apply OPSI task updates through the write backend in batches of up to OPSI_BATCH_SIZE tasks.
+
+    Returns ``(success, response)``. ``response`` has ``updated`` (Task IDs
+    applied), ``failed`` (Task ID -> error) and ``results`` (the backend's
+    response per chunk). Chunks go out in order, each keyed from ``idempotency_key``,
+    so resending the same batch can't apply a chunk twice.
+    """
+    chunk_size = chunk_size or int(st.secrets.get("OPSI_BATCH_SIZE", 100))
+    idempotency_key = idempotency_key or uuid.uuid4().hex
+    updates = list(updates)
+    chunks = [updates[i:i + chunk_size] for i in range(0, len(updates), chunk_size)]
+    response = {"updated": [], "failed": {}, "results": []}
+    if not chunks:
+        return False, response
+
+    writer = get_opsi_writer()
+    for number, chunk in enumerate(chunks, start=1):
+        failed, data = writer.update(chunk, f"{idempotency_key}-{number}")
+        response["failed"].update(failed)
+        response["updated"].extend(
+            task_id for task_id in (str(update.get("taskId")) for update in chunk) if task_id not in failed
+        )
+        if data is not None:
+            response["results"].append(data)
+        if on_progress:
+            on_progress(number, len(chunks))
+
+    if response["updated"]:
+        request_refresh("opsi")
+    return not response["failed"], response
 
 def update_opsi_task(update_data):
-    """Update existing OPSI task via n8n webhook"""
-    # UPDATED: Correct webhook URL for apexxadams
-    webhook_url = "https://apexxadams.app.n8n.cloud/webhook/opsi-update-task"
+    """Update one existing OPSI task via n8n (a batch of one)"""
+    success, response = update_opsi_tasks([update_data])
     
-    try:
-        response = requests.post(webhook_url, json=update_data, timeout=30)
-        
-        if response.status_code == 200:
-            try:
-                return response.json()
-            except:
-                return {"success": True, "message": "Task updated successfully"}
+    if success:
+        # Updates edit rows in place; the patch makes the refresher re-read the full sheet
+        values = _opsi_row_values(update_data)
+        patch_dataset("opsi", RowPatch(values, key_column="Task ID"))
+        return response["results"][0] if response["results"] else {"success": True, "message": "Task updated successfully"}
+    
+    st.error(f"❌ OPSI update error: {next(iter(response['failed'].values()), '')}")
+    return None
+
+# ========================================
+# PARALLEL PAGE LOADING
+# ========================================
+
+DATASET_LABELS = {"cora": "CORA", "opsi": "OPSI"}
+
+@timed("data.load_datasets")
+def load_datasets(*names):
+    """Load every dataset a page needs at once; cold sheets are fetched in parallel.
+
+    Returns one frame per name, in order. A sheet that fails or misses its
+    timeout (SHEET_LOAD_TIMEOUT seconds) comes back empty with a message,
+    instead of holding up the others.
+    """
+    timeout = float(st.secrets.get("SHEET_LOAD_TIMEOUT", 30))
+    snapshots = get_snapshots(names, timeouts={name: timeout for name in names})
+    frames = []
+    for name in names:
+        snapshot = snapshots[name]
+        label = DATASET_LABELS.get(name, name)
+        if snapshot is None:
+            st.warning(f"⏳ {label} data is still loading; refresh in a moment.")
+            frames.append(pd.DataFrame())
+        elif isinstance(snapshot, Exception):
+            st.error(f"❌ Error loading {label} data: {snapshot}")
+            frames.append(pd.DataFrame())
         else:
-            error_msg = f"HTTP {response.status_code}"
-            try:
-                error_detail = response.json()
-                st.error(f"❌ OPSI update webhook error: {error_msg} - {error_detail}")
-            except:
-                st.error(f"❌ OPSI update webhook error: {error_msg}")
-            return None
-            
-    except requests.exceptions.Timeout:
-        st.error("❌ Request timed out - task update may still be processing")
-        return None
-    except requests.exceptions.ConnectionError:
-        st.error("❌ Connection failed - check webhook URL and n8n status")
-        return None
+            frames.append(_snapshot_frame(snapshot))
+    return frames
+
+# ========================================
+# DASHBOARD METRICS
+# ========================================
+
+@st.cache_resource(max_entries=4)
+def _lead_metrics(version, day, _frame):
+    cache_miss("lead_metrics")
+    return compute_lead_metrics(_frame, today=day)
+
+def get_lead_metrics(df):
+    """Lead counts for a loaded CORA frame, computed once per data version and day"""
+    cache_lookup("lead_metrics")
+    return _lead_metrics(df.attrs.get("snapshot_version"), datetime.now().strftime("%Y-%m-%d"), df)
+
+@st.cache_resource(max_entries=2)
+def _task_metrics(version, _frame):
+    cache_miss("task_metrics")
+    return compute_task_metrics(_frame)
+
+def get_task_metrics(df):
+    """Task counts for a loaded OPSI frame, computed once per data version"""
+    cache_lookup("task_metrics")
+    return _task_metrics(df.attrs.get("snapshot_version"), df)
+
+# ========================================
+# OUTBOX (NON-BLOCKING WRITES)
+# ========================================
+
+def _outbox_approve_leads(payload, progress):
+    """Outbox handler: send a queued lead approval to MARK"""
+    success, response = send_approved_leads_to_mark(payload["lead_ids"], on_progress=progress)
+    if success:
+        return True, {"approved": len(response["approved"])}
+    # Resending the whole set is safe: unchanged chunks carry the same idempotency keys
+    return False, f"{len(response['failed'])} lead(s) failed: {next(iter(response['failed'].values()), '')}"
+
+def _outbox_create_task(payload, progress):
+    """Outbox handler: write a queued task creation through the OPSI write backend"""
+    ok, result = get_opsi_writer().create(payload["task"], payload["idempotency_key"])
+    if ok:
+        request_refresh("opsi")
+    return ok, result
+
+def _outbox_update_tasks(payload, progress):
+    """Outbox handler: send queued task updates to OPSI in batched chunks"""
+    # Writes queued before batching carry a single "update"
+    updates = payload.get("updates") or [payload["update"]]
+    success, response = update_opsi_tasks(updates, idempotency_key=payload["idempotency_key"], on_progress=progress)
+    if success:
+        return True, {"updated": response["updated"]}
+    # Resending the whole batch is safe: its chunks carry the same idempotency keys
+    failed = response["failed"]
+    details = "; ".join(f"{task_id}: {error}" for task_id, error in list(failed.items())[:5])
+    return False, f"{len(failed)} of {len(updates)} task(s) failed - {details}"
+
+def _outbox_task_event(payload, progress):
+    """Outbox handler: tell n8n about a direct sheet write so it runs the side effects"""
+    endpoint = st.secrets.get("OPSI_EVENTS_WEBHOOK")
+    if not endpoint:
+        # Queued before the webhook was switched off; nothing is listening for it
+        return True, {"skipped": "OPSI_EVENTS_WEBHOOK not set"}
+    result = get_webhook_client().post(
+        endpoint, {"event": payload["event"], **payload["data"]}, idempotency_key=payload["idempotency_key"]
+    )
+    return (True, result.data) if result.ok else (False, result.error)
+
+def _discard_failed_write(kind, item_id):
+    """Roll back the optimistic row for a task write that was dead-lettered"""
+    if kind in ("create_task", "update_task"):
+        discard_patches("opsi", item_id)
+
+outbox.register_handler("approve_leads", _outbox_approve_leads)
+outbox.register_handler("create_task", _outbox_create_task)
+outbox.register_handler("update_task", _outbox_update_tasks)
+outbox.register_handler("task_event", _outbox_task_event)
+outbox.on_failed(_discard_failed_write)
+
+def queue_lead_approval(lead_ids):
+    """Queue approved Lead IDs for MARK and return immediately"""
+    return outbox.enqueue(
+        "approve_leads",
+        {"lead_ids": list(lead_ids)},
+        order_key="mark-approvals",
+        label=f"Approve {len(lead_ids)} lead(s)"
+    )
+
+def queue_opsi_task(task_data):
+    """Queue a new OPSI task and show it optimistically; returns the outbox ID"""
+    item_id = outbox.enqueue(
+        "create_task",
+        {"task": task_data, "idempotency_key": uuid.uuid4().hex},
+        label=f"Create task '{task_data.get('title', '')}'"
+    )
+    patch_dataset("opsi", RowPatch(_opsi_row_values(task_data, {"Status": "New"}), tag=item_id))
+    return item_id
+
+def queue_opsi_updates(updates, label=None):
+    """Queue updates to many OPSI tasks as one batched write and show them optimistically.
+
+    Task updates share one order key, so a task's later edits (bulk or
+    single) always land after its earlier ones. Returns the outbox ID.
+    """
+    updates = list(updates)
+    item_id = outbox.enqueue(
+        "update_task",
+        {"updates": updates, "idempotency_key": uuid.uuid4().hex},
+        order_key="opsi-updates",
+        label=label or f"Update {len(updates)} task(s)"
+    )
+    # One patch per distinct change, so a bulk edit is a single patch however many rows it touches
+    changes = {}
+    for update in updates:
+        values = _opsi_row_values(update)
+        task_id = values.pop("Task ID", None)
+        key = json.dumps(values, sort_keys=True, default=str)
+        changes.setdefault(key, (values, []))[1].append(task_id)
+    for values, task_ids in changes.values():
+        patch_dataset("opsi", RowPatch(values, key_column="Task ID", keys=task_ids, tag=item_id))
+    return item_id
+
+def queue_opsi_update(update_data):
+    """Queue a single OPSI task update (a batch of one)"""
+    return queue_opsi_updates([update_data], label=f"Update task {update_data.get('taskId')}")
+
+def get_outbox_status(limit=10):
+    """Counts per state plus the most recent queued writes, for the UI"""
+    try:
+        outbox.ensure_worker()
+        return outbox.counts(), outbox.recent(limit)
     except Exception as e:
-        st.error(f"❌ Error updating OPSI task: {e}")
+        st.error(f"❌ Outbox unavailable: {e}")
+        return {}, []
+
+def retry_outbox_item(item_id):
+    """Re-queue a failed write at the back of the queue"""
+    return outbox.retry(item_id)
+
+# ========================================
+# AGENT HEALTH
+# ========================================
+
+# Total time one probe round may take; probes run concurrently within it
+HEALTH_BUDGET = 2.0
+
+def _sheet_freshness(name, stale_after):
+    """Probe: how recently the refresher read a sheet, without fetching it"""
+    def check():
+        snapshot = peek_snapshot(name)
+        if snapshot is None:
+            return None, "Sheet not loaded yet"
+        age = (datetime.now(timezone.utc) - snapshot.fetched_at).total_seconds()
+        if snapshot.error:
+            return False, f"Sheet read failing, data from {ago(age)}: {snapshot.error}"
+        if age > stale_after:
+            return False, f"Sheet data is stale (read {ago(age)})"
+        return True, f"Sheet read {ago(age)}"
+    return check
+
+def _n8n_reachable():
+    """Probe: whether the n8n instance answers its health endpoint"""
+    result = get_webhook_client().ping(timeout=HEALTH_BUDGET)
+    if result.ok:
+        return True, f"n8n answered in {result.elapsed * 1000:.0f} ms"
+    return False, f"n8n unreachable: {result.error}"
+
+def _last_run(label, *kinds):
+    """Probe: when a workflow last completed, from the outbox's sent writes"""
+    def check():
+        sent = [at for at in (outbox.last_sent(kind) for kind in kinds) if at is not None]
+        if not sent:
+            return None, f"No {label} yet"
+        return True, f"Last {label} {ago(datetime.now().timestamp() - max(sent))}"
+    return check
+
+health_monitor = HealthMonitor(budget=HEALTH_BUDGET)
+health_monitor.register("cora_sheet", _sheet_freshness("cora", stale_after=1800), ttl=15)
+health_monitor.register("opsi_sheet", _sheet_freshness("opsi", stale_after=600), ttl=15)
+health_monitor.register("n8n", _n8n_reachable, ttl=60)
+health_monitor.register("mark_last_run", _last_run("approval sent", "approve_leads"), ttl=15)
+health_monitor.register("opsi_last_run", _last_run("task write", "create_task", "update_task"), ttl=15)
+
+# Which probes decide each agent's badge
+AGENT_PROBES = {
+    "CORA": ["cora_sheet"],
+    "MARK": ["n8n", "mark_last_run"],
+    "OPSI": ["opsi_sheet", "n8n", "opsi_last_run"],
+}
+
+def get_agent_health(agent):
+    """Return (status, details) for an agent from cached probe results; never waits on a probe"""
+    results = health_monitor.results()
+    names = AGENT_PROBES[agent]
+    return summarize(results, names), [results[name].detail for name in names]
+
+# ========================================
+# TELEMETRY ENDPOINT
+# ========================================
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Serve span timings and cache counters once per process (METRICS_PORT, 0 disables)"""
+    port = int(st.secrets.get("METRICS_PORT", 9464))
+    if not port:
+        return None
+    try:
+        return serve_metrics(port, host=st.secrets.get("METRICS_HOST", "127.0.0.1"))
+    except OSError as e:
+        # Another process (e.g. a second dashboard) already holds the port
+        logger.warning("Metrics endpoint not started on port %s: %s", port, e)
         return None
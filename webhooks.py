@@ -0,0 +1,136 @@
+import threading
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Optional
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# ========================================
+# N8N WEBHOOK CLIENT
+# ========================================
+
+DEFAULT_BASE_URL = "https://apexxadams.app.n8n.cloud/webhook"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+LATENCY_SAMPLES = 500
+
+
+@dataclass
+class WebhookResult:
+    """Outcome of one webhook call; ``data`` is the parsed JSON body, if any"""
+    ok: bool
+    status: Optional[int] = None
+    data: Any = None
+    error: Optional[str] = None
+    elapsed: float = 0.0
+
+
+def _percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+
+class WebhookClient:
+    """Shared client for every n8n webhook.
+
+    Keeps one pooled keep-alive ``requests.Session`` so calls reuse TCP/TLS
+    connections. 429 and 5xx responses are retried with exponential backoff
+    (honouring Retry-After). Read timeouts are not retried, since the workflow
+    may still be running. Every call carries an ``Idempotency-Key`` header that
+    stays the same across its retries.
+    """
+
+    def __init__(self, base_url=DEFAULT_BASE_URL, retries=3, backoff=0.5, pool_size=10, timeout=30, health_url=None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # n8n serves /healthz at the instance root, beside /webhook
+        parts = urlsplit(self.base_url)
+        self.health_url = health_url or f"{parts.scheme}://{parts.netloc}/healthz"
+        retry = Retry(
+            total=retries,
+            read=0,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._latency = {}
+        self._latency_lock = threading.Lock()
+
+    def url(self, endpoint):
+        return f"{self.base_url}/{endpoint.lstrip('/')}"
+
+    def post(self, endpoint, payload, idempotency_key=None, timeout=None):
+        """POST JSON to an n8n webhook and return a WebhookResult (never raises)"""
+        headers = {"Idempotency-Key": idempotency_key or uuid.uuid4().hex}
+        start = time.perf_counter()
+        try:
+            response = self.session.post(
+                self.url(endpoint), json=payload, headers=headers, timeout=timeout or self.timeout
+            )
+        except requests.exceptions.Timeout:
+            return self._done(endpoint, start, WebhookResult(False, error="Request timed out - workflow may still be processing"))
+        except requests.exceptions.ConnectionError:
+            return self._done(endpoint, start, WebhookResult(False, error="Connection failed - check webhook URL and n8n status"))
+        except Exception as e:
+            return self._done(endpoint, start, WebhookResult(False, error=f"Error: {str(e)}"))
+
+        try:
+            data = response.json()
+        except ValueError:
+            data = None
+
+        if response.status_code == 200:
+            return self._done(endpoint, start, WebhookResult(True, 200, data))
+
+        detail = data if data is not None else response.text
+        return self._done(
+            endpoint,
+            start,
+            WebhookResult(False, response.status_code, data, f"HTTP {response.status_code}: {detail}"),
+        )
+
+    def ping(self, timeout=2.0):
+        """GET the n8n health endpoint once, without retries; ok if the server answered"""
+        start = time.perf_counter()
+        try:
+            response = requests.get(self.health_url, timeout=timeout)
+        except requests.exceptions.Timeout:
+            return self._done("healthz", start, WebhookResult(False, error="Health check timed out"))
+        except requests.exceptions.ConnectionError:
+            return self._done("healthz", start, WebhookResult(False, error="Connection failed - check webhook URL and n8n status"))
+        except Exception as e:
+            return self._done("healthz", start, WebhookResult(False, error=f"Error: {str(e)}"))
+        ok = response.status_code < 500
+        error = None if ok else f"HTTP {response.status_code}"
+        return self._done("healthz", start, WebhookResult(ok, response.status_code, error=error))
+
+    def _done(self, endpoint, start, result):
+        result.elapsed = time.perf_counter() - start
+        with self._latency_lock:
+            samples = self._latency.setdefault(endpoint, deque(maxlen=LATENCY_SAMPLES))
+            samples.append(result.elapsed)
+        return result
+
+    def latency_stats(self):
+        """Per-endpoint call count and p50/p95/max latency in seconds over recent calls"""
+        with self._latency_lock:
+            snapshot = {endpoint: list(samples) for endpoint, samples in self._latency.items()}
+        return {
+            endpoint: {
+                "count": len(samples),
+                "p50": _percentile(samples, 0.50),
+                "p95": _percentile(samples, 0.95),
+                "max": max(samples),
+            }
+            for endpoint, samples in snapshot.items()
+            if samples
+        }